@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished, request_started
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from foodgram.db import (close_unusable_connections,
+                                 mark_connections_released)
+
+        request_started.connect(close_unusable_connections)
+        request_finished.connect(mark_connections_released)
@@ -0,0 +1,85 @@
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import FileResponse
+from django.urls import URLPattern
+
+from foodgram.db import close_unusable_connections, mark_connections_released
+
+from .profiling import profile_connections
+
+# Синхронные view в Django 3.2 под ASGI выполняются в одном общем потоке.
+# Горячие пути чтения запускаются в пуле потоков со своими соединениями.
+ASYNC_VIEW_NAMES = (
+    'recipe-list', 'recipe-detail', 'recipe-bulk-export',
+    'recipe-download-shopping-cart', 'ingredient-list',
+)
+
+# Пул ограничен ASYNC_VIEW_THREADS, чтобы число соединений воркера с БД не
+# росло вместе с числом одновременных запросов.
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_VIEW_THREADS,
+    thread_name_prefix='async-view')
+
+
+def run_in_thread(func):
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        # Сигналы запроса под ASGI приходят в другом потоке, поэтому
+        # соединения потока пула проверяются и отмечаются здесь.
+        close_unusable_connections()
+        try:
+            with profile_connections():
+                return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+            mark_connections_released()
+
+    return sync_to_async(wrapper, thread_sensitive=False, executor=executor)
+
+
+def render(response):
+    if hasattr(response, 'render') and callable(response.render):
+        response.render()
+    # ASGIHandler Django 3.2 читает потоковый ответ в цикле событий, где
+    # генератор с запросами к БД падает с SynchronousOnlyOperation. Такой
+    # ответ записывается во временный файл здесь, а отдается из файла, чтобы
+    # выгрузка не держалась в памяти целиком.
+    if response.streaming and not isinstance(response, FileResponse):
+        file = tempfile.TemporaryFile()
+        for chunk in response:
+            file.write(chunk)
+        size = file.tell()
+        file.seek(0)
+        response = FileResponse(
+            file, status=response.status_code, headers=response.headers)
+        response['Content-Length'] = size
+    return response
+
+
+def make_async(view):
+    def render_view(request, *args, **kwargs):
+        return render(view(request, *args, **kwargs))
+
+    threaded_view = run_in_thread(render_view)
+
+    async def async_view(request, *args, **kwargs):
+        return await threaded_view(request, *args, **kwargs)
+
+    async_view.csrf_exempt = True
+    async_view.cls = getattr(view, 'cls', None)
+    async_view.actions = getattr(view, 'actions', None)
+    return async_view
+
+
+def make_async_urls(urlpatterns, names=ASYNC_VIEW_NAMES):
+    return [
+        URLPattern(
+            pattern.pattern, make_async(pattern.callback),
+            pattern.default_args, pattern.name)
+        if isinstance(pattern, URLPattern) and pattern.name in names
+        else pattern
+        for pattern in urlpatterns]
@@ -1,7 +1,10 @@
 import django_filters as filters
 from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef
 
-from recipes.models import Ingredient, Recipe
+from recipes.models import CartItem, Favorite, Ingredient, Recipe
+from recipes.search import search_recipes
+from recipes.services import get_tag_map
 from users.models import User
 
 
@@ -20,9 +23,31 @@ class TagsChoiceField(
                     params={'value': val},)
 
 
-class TagsFilter(filters.AllValuesMultipleFilter):
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_map()]
+
+
+class TagsFilter(filters.MultipleChoiceFilter):
     field_class = TagsChoiceField
 
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('choices', get_tag_choices)
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        tag_map = get_tag_map()
+        if any(slug not in tag_map for slug in value):
+            # Новый тег мог еще не дойти до закешированной карты.
+            tag_map = get_tag_map(refresh=True)
+        tag_ids = [tag_map[slug] for slug in value if slug in tag_map]
+        if not tag_ids:
+            return qs.none()
+        return qs.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'), tag_id__in=tag_ids)))
+
 
 class IngredientFilter(filters.FilterSet):
     name = filters.CharFilter(lookup_expr='istartswith')
@@ -36,15 +61,46 @@ class RecipeFilter(filters.FilterSet):
     author = filters.ModelChoiceFilter(
         queryset=User.objects.all())
     is_favorited = filters.BooleanFilter(
+        method='filter_is_favorited',
         widget=filters.widgets.BooleanWidget(),
         label='В избранном')
     is_in_shopping_cart = filters.BooleanFilter(
+        method='filter_is_in_shopping_cart',
         widget=filters.widgets.BooleanWidget(),
         label='В корзине')
-    tags = filters.AllValuesMultipleFilter(
+    tags = TagsFilter(
         field_name='tags__slug',
         label='Ссылка')
+    search = filters.CharFilter(
+        method='filter_search',
+        label='Поиск')
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'Популярные'),),
+        method='filter_ordering',
+        label='Сортировка')
 
     class Meta:
         model = Recipe
         fields = ['author', 'is_favorited', 'is_in_shopping_cart', 'tags']
+
+    def filter_user_recipes(self, queryset, model, value):
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.none() if value else queryset
+        recipe_ids = model.objects.filter(user=user).values('recipe_id')
+        if value:
+            return queryset.filter(id__in=recipe_ids)
+        return queryset.exclude(id__in=recipe_ids)
+
+    def filter_is_favorited(self, queryset, name, value):
+        return self.filter_user_recipes(queryset, Favorite, value)
+
+    def filter_is_in_shopping_cart(self, queryset, name, value):
+        return self.filter_user_recipes(queryset, CartItem, value)
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(
+            '-favorites_count', '-in_carts_count', '-id')
@@ -1,8 +1,14 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Count, OuterRef, Prefetch, Subquery
 from django.shortcuts import get_object_or_404
-from rest_framework.permissions import AllowAny
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS, AllowAny
+from rest_framework.response import Response
 
 from .permissions import IsAdminOrReadOnly
+from .response_cache import response_cache
+from foodgram.routers import is_sticky, use_replica
 from recipes.models import Recipe
 from .serializers import SubscribeRecipeSerializer
 
@@ -22,3 +28,57 @@ class GetObjectMixin:
 class PermissionAndPaginationMixin:
     permission_classes = (IsAdminOrReadOnly,)
     pagination_class = None
+
+
+class ReplicaReadMixin:
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (settings.DATABASE_REPLICAS and request.method in SAFE_METHODS
+                and not is_sticky(request.user)):
+            use_replica.set(True)
+
+
+class AnonymousCacheMixin:
+    cache_scope = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = response_cache.get_key(self.cache_scope, request)
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(key, response.data)
+        return response
+
+
+class SubscribeQuerysetMixin:
+
+    def get_subscribe_queryset(self):
+        recipes = Recipe.objects.all()
+        limit = self.request.query_params.get('recipes_limit', '')
+        if limit.isdigit():
+            recipes = recipes.filter(id__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('id')[:int(limit)]))
+        return self.request.user.follower.select_related(
+            'author'
+        ).annotate(
+            recipes_count=Count('author__recipe')
+        ).order_by('-id').prefetch_related(
+            Prefetch(
+                'author__recipe',
+                queryset=recipes,
+                to_attr='recipes_preview'))
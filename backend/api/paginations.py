@@ -1,6 +1,74 @@
-from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+            [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if (estimate is not None
+                and estimate >= settings.PAGINATION_ESTIMATE_THRESHOLD):
+            return estimate
+        return super().count
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = 6
+    django_paginator_class = EstimatedCountPaginator
+
+
+class RecipeCursorPagination(CursorPagination):
+    page_size_query_param = 'limit'
+    page_size = 6
+    ordering = ('-pub_date', '-id')
+
+
+class SubscribeCursorPagination(RecipeCursorPagination):
+    ordering = ('-created', '-id')
+
+
+class RecipePagination(LimitPageNumberPagination):
+    cursor_pagination_class = RecipeCursorPagination
+    # Параметры со своей сортировкой, которую курсор бы перезаписал.
+    ordering_params = ('ordering', 'search')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get('pagination') == 'cursor':
+            ordered = [
+                name for name in self.ordering_params
+                if request.query_params.get(name)]
+            if ordered:
+                raise ValidationError({
+                    name: 'Не поддерживается с pagination=cursor.'
+                    for name in ordered})
+            self.cursor = self.cursor_pagination_class()
+            return self.cursor.paginate_queryset(queryset, request, view)
+        self.cursor = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor:
+            return self.cursor.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class SubscribePagination(RecipePagination):
+    cursor_pagination_class = SubscribeCursorPagination
@@ -0,0 +1,200 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+PLACEHOLDERS = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+current_profile = ContextVar('current_profile', default=None)
+
+
+def get_fingerprint(sql):
+    sql = PLACEHOLDERS.sub('(...)', sql)
+    return hashlib.sha1(sql.encode()).hexdigest()[:12], sql[:300]
+
+
+def get_average_ms(values):
+    return round(sum(values) * 1000 / len(values), 2)
+
+
+class Profile:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.endpoint = None
+        self.queries = Counter()
+        self.statements = {}
+        self.sql_time = 0
+        self.serializer_time = 0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            fingerprint, statement = get_fingerprint(sql)
+            self.queries[fingerprint] += 1
+            self.statements[fingerprint] = statement
+
+    def get_duplicates(self):
+        return {
+            fingerprint: count
+            for fingerprint, count in self.queries.items() if count > 1}
+
+    def get_server_timing(self, total):
+        return ', '.join((
+            f'db;dur={self.sql_time * 1000:.1f};'
+            f'desc="{sum(self.queries.values())} queries"',
+            f'serializer;dur={self.serializer_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}'))
+
+
+class ProfileStore:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(
+            lambda: deque(maxlen=settings.QUERY_PROFILING_WINDOW))
+        self.statements = {}
+
+    def add(self, profile, total):
+        sample = (
+            sum(profile.queries.values()), profile.sql_time,
+            profile.serializer_time, total, profile.get_duplicates())
+        with self.lock:
+            self.samples[profile.endpoint].append(sample)
+            self.statements.update(
+                (fingerprint, profile.statements[fingerprint])
+                for fingerprint in sample[4])
+
+    def summary(self):
+        with self.lock:
+            samples = {
+                endpoint: list(items)
+                for endpoint, items in self.samples.items()}
+            statements = dict(self.statements)
+        result = []
+        for endpoint, items in samples.items():
+            duplicates = Counter()
+            for *_, sample_duplicates in items:
+                duplicates.update(sample_duplicates)
+            queries, sql_time, serializer_time, total, _ = zip(*items)
+            result.append({
+                'endpoint': endpoint,
+                'requests': len(items),
+                'queries_avg': round(sum(queries) / len(items), 1),
+                'queries_max': max(queries),
+                'sql_ms_avg': get_average_ms(sql_time),
+                'serializer_ms_avg': get_average_ms(serializer_time),
+                'total_ms_avg': get_average_ms(total),
+                'duplicates': [
+                    {'fingerprint': fingerprint, 'count': count,
+                     'sql': statements.get(fingerprint)}
+                    for fingerprint, count in duplicates.most_common(10)],
+            })
+        return sorted(
+            result, key=lambda item: item['sql_ms_avg'], reverse=True)
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.statements.clear()
+
+
+profile_store = ProfileStore()
+serializer_data = BaseSerializer.data
+
+
+def profiled_data(self):
+    profile = current_profile.get()
+    if profile is None or profile.serializing:
+        return serializer_data.fget(self)
+    profile.serializing = True
+    start = time.perf_counter()
+    try:
+        return serializer_data.fget(self)
+    finally:
+        profile.serializer_time += time.perf_counter() - start
+        profile.serializing = False
+
+
+class SerializerTimer:
+    # Время сериализации считается по верхнеуровневому .data. Подмена
+    # свойства действует, только пока идет хотя бы один профилируемый
+    # запрос, и снимается после последнего.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+
+    def __enter__(self):
+        with self.lock:
+            if not self.active:
+                BaseSerializer.data = property(profiled_data)
+            self.active += 1
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.active -= 1
+            if not self.active:
+                BaseSerializer.data = serializer_data
+
+
+serializer_timer = SerializerTimer()
+
+
+@contextmanager
+def profile_connections():
+    # execute_wrapper ставится на соединения текущего потока, поэтому view
+    # из пула потоков под ASGI подключают профиль запроса заново.
+    profile = current_profile.get()
+    with ExitStack() as stack:
+        if profile is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+        yield
+
+
+def get_endpoint(request, view_func):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{request.method} {view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{request.method} {view_class.__name__}.{action}'
+
+
+class QueryProfilingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        profile = Profile()
+        token = current_profile.set(profile)
+        try:
+            with serializer_timer, profile_connections():
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        total = time.perf_counter() - profile.started
+        response['Server-Timing'] = profile.get_server_timing(total)
+        if profile.endpoint:
+            profile_store.add(profile, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = current_profile.get()
+        if profile is not None:
+            profile.endpoint = get_endpoint(request, view_func)
@@ -0,0 +1,68 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.versions import get_version
+
+
+class ResponseCache:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = OrderedDict()
+        self.stats = Counter()
+
+    def get_key(self, scope, request):
+        query = '&'.join(
+            f'{name}={value}'
+            for name, values in sorted(request.query_params.lists())
+            for value in sorted(values))
+        # Ответы содержат абсолютные ссылки, построенные по адресу запроса.
+        digest = hashlib.sha256(
+            f'{request.scheme}://{request.get_host()}{request.path}?{query}'
+            .encode()).hexdigest()
+        return f'response:{scope}:{get_version(scope)}:{digest}'
+
+    def get(self, key):
+        with self.lock:
+            entry = self.local.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.local.move_to_end(key)
+                self.stats['local_hits'] += 1
+                return entry[1]
+        data = cache.get(key)
+        with self.lock:
+            if data is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['shared_hits'] += 1
+        self.set_local(key, data)
+        return data
+
+    def set(self, key, data):
+        cache.set(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+        self.set_local(key, data)
+
+    def set_local(self, key, data):
+        with self.lock:
+            self.local[key] = (
+                time.monotonic() + settings.RESPONSE_CACHE_TIMEOUT, data)
+            self.local.move_to_end(key)
+            while len(self.local) > settings.RESPONSE_CACHE_LOCAL_SIZE:
+                self.local.popitem(last=False)
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'local_hits': self.stats['local_hits'],
+                'shared_hits': self.stats['shared_hits'],
+                'misses': self.stats['misses'],
+                'local_size': len(self.local),
+            }
+
+
+response_cache = ResponseCache()
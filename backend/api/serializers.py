@@ -1,15 +1,28 @@
 from rest_framework import serializers
-from drf_extra_fields.fields import Base64ImageField
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 from recipes.models import (Recipe, Ingredient,
                             Tag, Subscribe,
                             RecipeIngredient)
+from recipes.images import get_image_variants
+from recipes.jobs import enqueue_image
+from recipes.search import update_search_vector
+from recipes.services import update_shopping_lists
+from recipes.versions import get_recipe_scope, get_version, get_versions
 from users.mixins import GetSubscribedMixin
 
 User = get_user_model()
 
+RECIPE_PREFETCHES = (
+    'tags',
+    models.Prefetch(
+        'recipe',
+        queryset=RecipeIngredient.objects.select_related('ingredient')),
+)
+
 
 class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
@@ -63,39 +76,20 @@ class EditIngredientsSerializer(serializers.ModelSerializer):
 
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
-    image = Base64ImageField(
-        max_length=None,
-        use_url=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tag.objects.all())
+    image = serializers.CharField(
+        write_only=True)
+    tags = serializers.ListField(
+        child=serializers.IntegerField())
     ingredients = EditIngredientsSerializer(
         many=True)
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        exclude = (
+            'search_vector', 'image_variants', 'image_status',
+            'favorites_count', 'in_carts_count')
         read_only_fields = ('author',)
 
-    def validate(self, data):
-        ingredients_list = []
-        for items in data['ingredients']:
-            ingredient = get_object_or_404(
-                Ingredient, id=items['id'])
-            if ingredient in ingredients_list:
-                raise serializers.ValidationError(
-                    'Неуникальный ингредиент.')
-            ingredients_list.append(ingredient)
-        tags = data['tags']
-        if not tags:
-            raise serializers.ValidationError(
-                'Для рецепта необходимо указать тэг.')
-        for name_tag in tags:
-            if not Tag.objects.filter(name=name_tag).exists():
-                raise serializers.ValidationError(
-                    f'Тэг {name_tag} не нейден')
-        return data
-
     def validate_cooking_time(self, cooking_time):
         if int(cooking_time) < 1:
             raise serializers.ValidationError(
@@ -110,35 +104,91 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             if int(ingredient.get('amount')) < 1:
                 raise serializers.ValidationError(
                     'Количество ингредиента должно быть больше или равно 1')
+        ids = [ingredient['id'] for ingredient in ingredients]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError(
+                'Неуникальный ингредиент.')
+        missing = set(ids) - set(
+            Ingredient.objects.filter(
+                id__in=ids
+            ).values_list('id', flat=True))
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиенты {sorted(missing)} не найдены.')
         return ingredients
 
-    def create_ingredients(self, ingredients, recipe):
-        for ingredient in ingredients:
-            RecipeIngredient.objects.create(
+    def validate_tags(self, tags):
+        if not tags:
+            raise serializers.ValidationError(
+                'Для рецепта необходимо указать тэг.')
+        tags_list = list(Tag.objects.filter(id__in=tags))
+        missing = set(tags) - {tag.id for tag in tags_list}
+        if missing:
+            raise serializers.ValidationError(
+                f'Тэги {sorted(missing)} не найдены.')
+        return tags_list
+
+    def save_ingredients(self, recipe, ingredients):
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients}
+        existing = {
+            item.ingredient_id: item
+            for item in RecipeIngredient.objects.filter(recipe=recipe)}
+        old_amounts = {
+            ingredient_id: item.amount
+            for ingredient_id, item in existing.items()}
+        removed = [
+            item.id for ingredient_id, item in existing.items()
+            if ingredient_id not in amounts]
+        changed = []
+        for ingredient_id, item in existing.items():
+            if amounts.get(ingredient_id, item.amount) != item.amount:
+                item.amount = amounts[ingredient_id]
+                changed.append(item)
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
                 recipe=recipe,
-                ingredient_id=ingredient.get('id'),
-                amount=ingredient.get('amount'),)
+                ingredient_id=ingredient_id,
+                amount=amount)
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in existing)
+        return old_amounts, amounts
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
+        image = validated_data.pop('image')
         recipe = Recipe.objects.create(**validated_data)
-        recipe.tags.set(tags)
-        self.create_ingredients(ingredients, recipe)
+        recipe.tags.add(*tags)
+        self.save_ingredients(recipe, ingredients)
+        enqueue_image(recipe, image)
+        update_search_vector(Recipe.objects.filter(id=recipe.id))
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         if 'ingredients' in validated_data:
-            ingredients = validated_data.pop('ingredients')
-            instance.ingredients.clear()
-            self.create_ingredients(ingredients, instance)
+            update_shopping_lists(
+                instance,
+                *self.save_ingredients(
+                    instance, validated_data.pop('ingredients')))
         if 'tags' in validated_data:
             instance.tags.set(
                 validated_data.pop('tags'))
-        return super().update(
+        if 'image' in validated_data:
+            enqueue_image(instance, validated_data.pop('image'))
+        instance = super().update(
             instance, validated_data)
+        update_search_vector(Recipe.objects.filter(id=instance.id))
+        return instance
 
     def to_representation(self, instance):
+        models.prefetch_related_objects([instance], *RECIPE_PREFETCHES)
         return RecipeReadSerializer(
             instance,
             context={
@@ -146,8 +196,65 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             }).data
 
 
+class RecipeListSerializer(
+        GetSubscribedMixin,
+        serializers.ListSerializer):
+
+    def get_fragments(self, recipes):
+        request = self.context['request']
+        # Фрагмент устаревает с версией своего рецепта или тегов.
+        suffix = (
+            f'{get_version("tags")}:'
+            f'{request.scheme}://{request.get_host()}')
+        versions = get_versions(
+            get_recipe_scope(recipe.id) for recipe in recipes)
+        keys = {
+            recipe.id: (
+                f'recipe:{recipe.id}:'
+                f'{versions[get_recipe_scope(recipe.id)]}:{suffix}')
+            for recipe in recipes}
+        fragments = cache.get_many(keys.values())
+        missing = [
+            recipe for recipe in recipes if keys[recipe.id] not in fragments]
+        if missing:
+            models.prefetch_related_objects(missing, *RECIPE_PREFETCHES)
+            computed = {
+                keys[recipe.id]: self.child.to_representation(recipe)
+                for recipe in missing}
+            cache.set_many(computed, settings.RECIPE_FRAGMENT_TIMEOUT)
+            fragments.update(computed)
+        return [fragments[keys[recipe.id]] for recipe in recipes]
+
+    def to_representation(self, data):
+        recipes = list(
+            data.all() if isinstance(data, models.Manager) else data)
+        ids = [recipe.id for recipe in recipes]
+        user = self.context['request'].user
+        favorites, carts = set(), set()
+        if user.is_authenticated:
+            favorites = set(user.favorites.filter(
+                recipe_id__in=ids).values_list('recipe_id', flat=True))
+            carts = set(user.cart_items.filter(
+                recipe_id__in=ids).values_list('recipe_id', flat=True))
+        subscriptions = self.get_subscriptions()
+        return [
+            {
+                **fragment,
+                'author': {
+                    **fragment['author'],
+                    'is_subscribed': recipe.author_id in subscriptions},
+                'is_favorited': recipe.id in favorites,
+                'is_in_shopping_cart': recipe.id in carts,
+                'favorites_count': recipe.favorites_count,
+                'in_carts_count': recipe.in_carts_count,
+            } for recipe, fragment in zip(
+                recipes, self.get_fragments(recipes))]
+
+
 class RecipeReadSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+    image = serializers.ImageField(
+        read_only=True)
+    images = serializers.SerializerMethodField()
     tags = TagSerializer(
         many=True,
         read_only=True)
@@ -159,13 +266,21 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         required=True,
         source='recipe')
     is_favorited = serializers.BooleanField(
-        read_only=True)
+        read_only=True,
+        default=False)
     is_in_shopping_cart = serializers.BooleanField(
-        read_only=True)
+        read_only=True,
+        default=False)
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        exclude = ('search_vector', 'image_variants')
+        list_serializer_class = RecipeListSerializer
+
+    def get_images(self, obj):
+        return get_image_variants(
+            obj.image_variants,
+            self.context['request'].build_absolute_uri)
 
 
 class SubscribeRecipeSerializer(serializers.ModelSerializer):
@@ -175,7 +290,9 @@ class SubscribeRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
-class SubscribeSerializer(serializers.ModelSerializer):
+class SubscribeSerializer(
+        GetSubscribedMixin,
+        serializers.ModelSerializer):
     id = serializers.IntegerField(
         source='author.id')
     email = serializers.EmailField(
@@ -187,7 +304,7 @@ class SubscribeSerializer(serializers.ModelSerializer):
     last_name = serializers.CharField(
         source='author.last_name')
     recipes = serializers.SerializerMethodField()
-    is_subscribed = serializers.BooleanField(
+    is_subscribed = serializers.SerializerMethodField(
         read_only=True)
     recipes_count = serializers.IntegerField(
         read_only=True)
@@ -198,12 +315,11 @@ class SubscribeSerializer(serializers.ModelSerializer):
             'id', 'email', 'username', 'first_name', 'last_name',
             'is_subscribed', 'recipes', 'recipes_count',)
 
+    def get_is_subscribed(self, obj):
+        return super().get_is_subscribed(obj.author)
+
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = (
-            obj.author.recipe.all()[:int(limit)] if limit
-            else obj.author.recipe.all())
         return SubscribeRecipeSerializer(
-            recipes,
-            many=True).data
+            obj.author.recipes_preview,
+            many=True,
+            context=self.context).data
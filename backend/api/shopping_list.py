@@ -0,0 +1,158 @@
+import csv
+import hashlib
+import io
+import itertools
+import os
+import tempfile
+from functools import lru_cache
+
+from django.conf import settings
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FONT_NAME = 'Vera'
+FONT_FILE = 'Vera.ttf'
+LINES_PER_PAGE = 50
+X, Y = 50, 800
+LEADING = 15
+TITLE = 'Cписок покупок:'
+EMPTY_TITLE = 'Cписок покупок пуст.'
+CSV_HEADER = ('Ингредиент', 'Количество', 'Единица измерения')
+
+
+@lru_cache(maxsize=None)
+def get_font():
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_FILE))
+    return FONT_NAME
+
+
+def get_lines(items):
+    for index, item in enumerate(items, start=1):
+        yield (
+            f'{index}. {item["ingredient__name"]} - '
+            f'{item["amount"]} '
+            f'{item["ingredient__measurement_unit"]}.')
+
+
+def render_pdf(items, file):
+    font = get_font()
+    page = canvas.Canvas(file)
+    lines = get_lines(items)
+    chunk = list(itertools.islice(lines, LINES_PER_PAGE))
+    if not chunk:
+        page.setFont(font, 24)
+        page.drawString(X, Y, EMPTY_TITLE)
+        page.save()
+        return file
+    page.setFont(font, 14)
+    page.drawString(X, Y, TITLE)
+    while chunk:
+        text = page.beginText(X, Y - 20)
+        text.setFont(font, 14, leading=LEADING)
+        text.textLines(chunk)
+        page.drawText(text)
+        chunk = list(itertools.islice(lines, LINES_PER_PAGE))
+        if chunk:
+            page.showPage()
+    page.save()
+    return file
+
+
+def render_text(items):
+    lines = get_lines(items)
+    first = next(lines, None)
+    if first is None:
+        yield f'{EMPTY_TITLE}\n'
+        return
+    yield f'{TITLE}\n'
+    for line in itertools.chain((first,), lines):
+        yield f'{line}\n'
+
+
+def render_csv(items):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for item in items:
+        writer.writerow((
+            item['ingredient__name'],
+            item['amount'],
+            item['ingredient__measurement_unit']))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_chunks(chunks, file):
+    for chunk in chunks:
+        file.write(chunk.encode())
+    return file
+
+
+def write_text(items, file):
+    return write_chunks(render_text(items), file)
+
+
+def write_csv(items, file):
+    return write_chunks(render_csv(items), file)
+
+
+OUTPUTS = {
+    'pdf': ('application/pdf', render_pdf),
+    'txt': ('text/plain; charset=utf-8', write_text),
+    'csv': ('text/csv; charset=utf-8', write_csv),
+}
+
+
+def get_cache_key(items, output):
+    digest = hashlib.sha256(output.encode())
+    for item in items:
+        digest.update(
+            f'{item["ingredient_id"]}\t{item["ingredient__name"]}\t'
+            f'{item["ingredient__measurement_unit"]}\t'
+            f'{item["amount"]}\n'.encode())
+    return digest.hexdigest()
+
+
+def evict_cached_files():
+    directory = settings.SHOPPING_LIST_CACHE_DIR
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.tmp'):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= settings.SHOPPING_LIST_CACHE_MAX_SIZE:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def open_cached_file(items, key, output):
+    directory = settings.SHOPPING_LIST_CACHE_DIR
+    path = os.path.join(directory, f'{key}.{output}')
+    try:
+        file = open(path, 'rb')
+        os.utime(path)
+        return file
+    except FileNotFoundError:
+        pass
+    os.makedirs(directory, exist_ok=True)
+    _, render = OUTPUTS[output]
+    with tempfile.NamedTemporaryFile(
+            dir=directory, suffix='.tmp', delete=False) as tmp:
+        render(items, tmp)
+    os.replace(tmp.name, path)
+    file = open(path, 'rb')
+    evict_cached_files()
+    return file
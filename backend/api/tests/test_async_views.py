@@ -0,0 +1,100 @@
+import json
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.http import FileResponse
+from django.conf import settings
+from django.test import TransactionTestCase, override_settings
+from django.urls import include, path
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.async_views import make_async_urls
+from api.profiling import profile_store
+from api.urls import router
+from recipes.models import Ingredient, Tag
+from recipes.tests.factories import create_recipes, create_user
+
+# URLconf режима asgi для запросов через AsyncClient.
+urlpatterns = [path('api/', include(make_async_urls(router.urls)))]
+
+
+class AsyncViewsTest(TransactionTestCase):
+    # View выполняются в пуле потоков со своими соединениями, поэтому данные
+    # должны быть закоммичены, а не лежать в транзакции теста.
+
+    def setUp(self):
+        cache.clear()
+        self.admin = create_user(0)
+        self.admin.is_staff = self.admin.is_superuser = True
+        self.admin.save()
+        tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        ingredient = Ingredient.objects.create(
+            name='Ингредиент', measurement_unit='г')
+        self.recipes = create_recipes([self.admin], 3, [tag], [ingredient])
+        self.views = {
+            pattern.name: pattern.callback
+            for pattern in make_async_urls(router.urls)}
+
+    def get(self, name, url):
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, self.admin)
+
+        # ASGIHandler Django 3.2 читает тело ответа прямо в цикле событий,
+        # где обращение к БД запрещено.
+        async def fetch():
+            response = await self.views[name](request)
+            return response, b''.join(response)
+
+        response, content = async_to_sync(fetch)()
+        self.assertEqual(response.status_code, 200, content)
+        return response, content
+
+    def test_export(self):
+        response, content = self.get(
+            'recipe-bulk-export', '/api/recipes/export/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        # Выгрузка отдается из временного файла, а не собирается в памяти.
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertEqual(
+            [json.loads(line)['name'] for line in content.splitlines()],
+            [recipe.name for recipe in reversed(self.recipes)])
+
+    def test_list(self):
+        _, content = self.get('recipe-list', '/api/recipes/')
+        self.assertEqual(json.loads(content)['count'], 3)
+
+    @override_settings(DB_CONN_HEALTH_CHECKS=True)
+    def test_pool_thread_checks_connections(self):
+        threads = []
+
+        def check():
+            threads.append(threading.current_thread().name)
+
+        with mock.patch(
+                'api.async_views.close_unusable_connections', check):
+            self.get('recipe-list', '/api/recipes/')
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('async-view'), threads)
+
+    @override_settings(
+        ROOT_URLCONF=__name__,
+        MIDDLEWARE=[
+            'api.profiling.QueryProfilingMiddleware', *settings.MIDDLEWARE],
+        QUERY_PROFILING_SAMPLE_RATE=1)
+    def test_profiling_counts_pool_thread_queries(self):
+        profile_store.clear()
+        self.addCleanup(profile_store.clear)
+
+        async def fetch():
+            return await self.async_client.get('/api/recipes/')
+
+        response = async_to_sync(fetch)()
+        self.assertEqual(response.status_code, 200)
+        queries, = [
+            item['queries_max'] for item in profile_store.summary()
+            if item['endpoint'] == 'GET RecipesViewSet.list']
+        self.assertGreater(queries, 0)
+        self.assertIn(f'desc="{queries} queries"', response['Server-Timing'])
@@ -0,0 +1,43 @@
+from time import monotonic
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from recipes.tests.factories import create_recipes, create_user
+
+
+@override_settings(DB_CONN_HEALTH_CHECKS=True)
+class ConnectionHealthCheckTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_recipes([create_user(0)], 3)
+
+    def setUp(self):
+        cache.clear()
+        # Первый запрос заполняет кеш анонимного списка и отмечает
+        # соединение как только что использованное.
+        self.get()
+
+    def get(self):
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_request_does_not_check_recent_connection(self):
+        is_usable = mock.patch.object(connection, 'is_usable')
+        with is_usable as check, self.assertNumQueries(0):
+            self.get()
+        check.assert_not_called()
+
+    def test_idle_connection_is_checked(self):
+        idle = monotonic() + settings.DB_CONN_HEALTH_CHECK_IDLE + 1
+        is_usable = mock.patch.object(
+            connection, 'is_usable', return_value=True)
+        clock = mock.patch('foodgram.db.monotonic', return_value=idle)
+        with clock, is_usable as check:
+            self.get()
+        check.assert_called_once_with()
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from recipes.models import CartItem, Favorite, Recipe
+from recipes.tests.factories import create_recipes, create_user
+
+
+class RecipeCountersTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(number) for number in range(3)]
+        cls.first, cls.second, cls.third = create_recipes(cls.users[:1], 3)
+
+    def setUp(self):
+        cache.clear()
+
+    def toggle(self, user, method, recipe, url='favorite'):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(
+                f'/api/recipes/{recipe.id}/{url}/')
+        self.assertIn(response.status_code, (201, 204), response.content)
+        self.client.force_authenticate(None)
+
+    def get_counters(self, recipe):
+        recipe.refresh_from_db()
+        return recipe.favorites_count, recipe.in_carts_count
+
+    def get_anonymous(self, query=''):
+        response = self.client.get(f'/api/recipes/{query}')
+        self.assertEqual(response.status_code, 200)
+        return {
+            recipe['id']: (
+                recipe['favorites_count'], recipe['in_carts_count'])
+            for recipe in response.data['results']}
+
+    def test_counters_follow_favorites_and_carts(self):
+        for user in self.users[:2]:
+            self.toggle(user, 'post', self.first)
+        self.toggle(self.users[0], 'post', self.first, 'shopping_cart')
+        self.assertEqual(self.get_counters(self.first), (2, 1))
+        self.toggle(self.users[0], 'delete', self.first)
+        self.toggle(self.users[0], 'delete', self.first, 'shopping_cart')
+        self.assertEqual(self.get_counters(self.first), (1, 0))
+
+    def test_anonymous_cache_sees_new_counters(self):
+        self.assertEqual(self.get_anonymous()[self.first.id], (0, 0))
+        self.toggle(self.users[1], 'post', self.first)
+        self.assertEqual(self.get_anonymous()[self.first.id], (1, 0))
+
+    def test_ordering_popular(self):
+        self.assertEqual(
+            list(self.get_anonymous('?ordering=popular')),
+            [self.third.id, self.second.id, self.first.id])
+        self.toggle(self.users[1], 'post', self.first)
+        self.toggle(self.users[1], 'post', self.second, 'shopping_cart')
+        self.assertEqual(
+            list(self.get_anonymous('?ordering=popular')),
+            [self.first.id, self.second.id, self.third.id])
+
+    def test_reconcile_command(self):
+        Favorite.objects.create(user=self.users[1], recipe=self.second)
+        CartItem.objects.create(user=self.users[2], recipe=self.second)
+        Recipe.objects.filter(id=self.third.id).update(favorites_count=5)
+        self.get_anonymous()
+        output = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                'reconcile_recipe_counters', batch_size=2, stdout=output)
+        self.assertIn('Исправлено счетчиков у рецептов: 2.', output.getvalue())
+        self.assertEqual(self.get_counters(self.first), (0, 0))
+        self.assertEqual(self.get_counters(self.second), (1, 1))
+        self.assertEqual(self.get_counters(self.third), (0, 0))
+        self.assertEqual(self.get_anonymous()[self.second.id], (1, 1))
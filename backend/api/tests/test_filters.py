@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from recipes.models import Tag
+from recipes.tests.factories import create_recipes, create_user
+
+
+class TagsFilterTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(1)
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#00000{number}',
+                slug=f'tag{number}')
+            for number in range(2)]
+        cls.recipes = create_recipes([cls.author], 2, cls.tags)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.author)
+
+    def get_ids(self, *slugs):
+        response = self.client.get('/api/recipes/', {'tags': slugs})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_several_tags_do_not_duplicate_recipes(self):
+        self.assertEqual(
+            self.get_ids('tag0', 'tag1'),
+            [recipe.id for recipe in reversed(self.recipes)])
+
+    def test_unknown_slug_returns_nothing(self):
+        self.assertEqual(self.get_ids('missing'), [])
+
+    def test_new_tag_missing_from_cached_map_is_found(self):
+        self.get_ids('tag0')
+        # Версия тегов сбрасывается только после коммита, карта устарела.
+        tag = Tag.objects.create(name='Новый', color='#000009', slug='new')
+        recipe, = create_recipes([self.author], 1, [tag])
+        self.assertEqual(self.get_ids('new'), [recipe.id])
+        self.assertEqual(self.get_ids('new', 'tag0')[0], recipe.id)
@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from recipes.jobs import set_image_status
+from recipes.models import ImageStatus, Ingredient, Tag
+from recipes.tests.factories import create_recipes, create_user
+from recipes.versions import get_recipe_scope, get_versions
+
+
+class RecipeFragmentTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [create_user(1), create_user(2)]
+        cls.salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        cls.pepper = Ingredient.objects.create(
+            name='Перец', measurement_unit='г')
+        cls.tag = Tag.objects.create(
+            name='Завтрак', color='#000000', slug='breakfast')
+        cls.salted, = create_recipes(
+            cls.authors[:1], 1, [cls.tag], [cls.salt])
+        cls.peppered, = create_recipes(
+            cls.authors[1:], 1, [cls.tag], [cls.pepper])
+
+    def setUp(self):
+        cache.clear()
+
+    def get_versions(self):
+        return get_versions(
+            get_recipe_scope(recipe.id)
+            for recipe in (self.salted, self.peppered))
+
+    def assert_bumped(self, change, bumped):
+        before = self.get_versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        after = self.get_versions()
+        self.assertEqual(
+            [scope for scope in before if before[scope] != after[scope]],
+            [get_recipe_scope(recipe.id) for recipe in bumped])
+
+    def test_recipe_save_bumps_only_that_recipe(self):
+        self.salted.name = 'Соленый рецепт'
+        self.assert_bumped(self.salted.save, [self.salted])
+
+    def test_image_job_bumps_only_that_recipe(self):
+        self.assert_bumped(
+            lambda: set_image_status(self.peppered.id, ImageStatus.FAILED),
+            [self.peppered])
+
+    def test_ingredient_changes_bump_recipes_using_it(self):
+        self.salt.measurement_unit = 'кг'
+        self.assert_bumped(self.salt.save, [self.salted])
+        self.assert_bumped(
+            lambda: Ingredient.objects.create(
+                name='Сахар', measurement_unit='г'),
+            [])
+
+    def test_signup_and_login_do_not_bump(self):
+        author = self.authors[0]
+        author.last_login = timezone.now()
+        self.assert_bumped(lambda: create_user(3), [])
+        self.assert_bumped(
+            lambda: author.save(update_fields=('last_login',)), [])
+
+    def test_profile_change_bumps_author_recipes(self):
+        author = self.authors[1]
+        author.first_name = 'Новое имя'
+        self.assert_bumped(author.save, [self.peppered])
+
+    def test_list_reflects_bumped_recipe_only(self):
+        self.client.get('/api/recipes/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salted.name = 'Соленый рецепт'
+            self.salted.save()
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(
+            [recipe['name'] for recipe in response.data['results']],
+            [self.peppered.name, 'Соленый рецепт'])
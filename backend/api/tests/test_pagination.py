@@ -0,0 +1,33 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from recipes.tests.factories import create_recipes, create_user
+
+
+class CursorPaginationTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipes = create_recipes([create_user(1)], 8)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_follow_publication_date(self):
+        response = self.client.get(
+            '/api/recipes/', {'pagination': 'cursor', 'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        ids = [recipe['id'] for recipe in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [recipe['id'] for recipe in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(
+            ids, [recipe.id for recipe in reversed(self.recipes)])
+
+    def test_rejects_own_ordering(self):
+        for params in ({'ordering': 'popular'}, {'search': 'Рецепт'}):
+            with self.subTest(params=params):
+                response = self.client.get(
+                    '/api/recipes/', {'pagination': 'cursor', **params})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.data), list(params))
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APITestCase
+
+from api.profiling import profile_store, serializer_data
+from recipes.models import Ingredient, Tag
+from recipes.tests.factories import create_recipes, create_user
+
+
+@override_settings(
+    MIDDLEWARE=[
+        'api.profiling.QueryProfilingMiddleware', *settings.MIDDLEWARE],
+    QUERY_PROFILING_SAMPLE_RATE=1)
+class QueryProfilingTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user(0)
+        cls.admin.is_staff = True
+        cls.admin.save()
+        tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        ingredient = Ingredient.objects.create(
+            name='Ингредиент', measurement_unit='г')
+        create_recipes([cls.admin], 3, [tag], [ingredient])
+
+    def setUp(self):
+        cache.clear()
+        profile_store.clear()
+        self.client.force_authenticate(self.admin)
+        # На Postgres пагинатор сначала читает оценку числа строк из pg_class.
+        self.estimate = int(connection.vendor == 'postgresql')
+
+    def get_summary(self):
+        response = self.client.get('/api/profiling/')
+        self.assertEqual(response.status_code, 200)
+        return {item['endpoint']: item for item in response.data}
+
+    def test_queries_and_serializer_time_per_route(self):
+        # Второй запрос берет фрагменты рецептов из кеша.
+        for queries in (7 + self.estimate, 5 + self.estimate):
+            response = self.client.get('/api/recipes/')
+            self.assertIn(
+                f'desc="{queries} queries"', response['Server-Timing'])
+        self.client.get('/api/tags/')
+        summary = self.get_summary()
+        recipes = summary['GET RecipesViewSet.list']
+        self.assertEqual(recipes['requests'], 2)
+        self.assertEqual(recipes['queries_max'], 7 + self.estimate)
+        self.assertEqual(recipes['queries_avg'], 6 + self.estimate)
+        self.assertGreater(recipes['serializer_ms_avg'], 0)
+        self.assertEqual(summary['GET TagsViewSet.list']['queries_max'], 1)
+
+    def test_clear(self):
+        self.client.get('/api/recipes/')
+        self.assertEqual(
+            self.client.delete('/api/profiling/').status_code, 204)
+        self.assertEqual(
+            list(self.get_summary()), ['DELETE query_profile.delete'])
+
+    def test_serializer_patch_is_removed_after_request(self):
+        self.client.get('/api/recipes/')
+        self.assertIs(BaseSerializer.data, serializer_data)
+
+    @override_settings(QUERY_PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_profiled(self):
+        response = self.client.get('/api/recipes/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(self.get_summary(), {})
@@ -0,0 +1,109 @@
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient, Subscribe, Tag
+from recipes.tests.factories import create_recipes, create_user
+
+
+class QueryCountTestCase(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.authors = [create_user(number) for number in range(1, 4)]
+        for author in cls.authors[:2]:
+            Subscribe.objects.create(user=cls.user, author=author)
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#00000{number}',
+                slug=f'tag{number}')
+            for number in range(2)]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(3)]
+        cls.recipes = create_recipes(
+            cls.authors, 6, cls.tags, cls.ingredients)
+
+    def setUp(self):
+        cache.clear()
+        # На Postgres пагинатор сначала читает оценку числа строк из pg_class.
+        self.estimate = int(connection.vendor == 'postgresql')
+
+    def get_with_queries(self, number, url):
+        with self.assertNumQueries(number):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+
+class RecipeQueriesTest(QueryCountTestCase):
+
+    def test_list(self):
+        self.client.force_authenticate(self.user)
+        # count, страница, теги, ингредиенты, подписки, избранное, корзина.
+        response = self.get_with_queries(7 + self.estimate, '/api/recipes/')
+        self.assertEqual(len(response.data['results']), 6)
+
+    def test_list_does_not_grow_with_page(self):
+        create_recipes(self.authors, 6, self.tags, self.ingredients)
+        self.client.force_authenticate(self.user)
+        response = self.get_with_queries(
+            7 + self.estimate, '/api/recipes/?limit=12')
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_list_with_cached_fragments(self):
+        self.client.force_authenticate(self.user)
+        self.client.get('/api/recipes/')
+        self.get_with_queries(5 + self.estimate, '/api/recipes/')
+
+    def test_list_anonymous(self):
+        self.get_with_queries(4 + self.estimate, '/api/recipes/')
+        self.get_with_queries(0, '/api/recipes/')
+
+    def test_detail(self):
+        self.client.force_authenticate(self.user)
+        self.get_with_queries(4, f'/api/recipes/{self.recipes[0].id}/')
+
+    def test_detail_anonymous(self):
+        self.get_with_queries(3, f'/api/recipes/{self.recipes[0].id}/')
+
+
+class UserQueriesTest(QueryCountTestCase):
+
+    def test_list(self):
+        self.client.force_authenticate(self.user)
+        # count, страница, подписки.
+        self.get_with_queries(3 + self.estimate, '/api/users/')
+
+    def test_list_does_not_grow_with_page(self):
+        for number in range(4, 10):
+            create_user(number)
+        self.client.force_authenticate(self.user)
+        response = self.get_with_queries(
+            3 + self.estimate, '/api/users/?limit=10')
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_me(self):
+        self.client.force_authenticate(self.user)
+        response = self.get_with_queries(1, '/api/users/me/')
+        self.assertEqual(response.data['id'], self.user.id)
+
+    def test_subscriptions(self):
+        self.client.force_authenticate(self.user)
+        # count, страница с авторами, рецепты авторов, подписки.
+        response = self.get_with_queries(4, '/api/users/subscriptions/')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertTrue(all(
+            item['is_subscribed'] for item in response.data['results']))
+
+    def test_subscriptions_do_not_grow_with_page(self):
+        for author in self.authors[2:] + [
+                create_user(number) for number in range(4, 8)]:
+            Subscribe.objects.create(user=self.user, author=author)
+        create_recipes(self.authors, 6)
+        self.client.force_authenticate(self.user)
+        response = self.get_with_queries(
+            4, '/api/users/subscriptions/?recipes_limit=2')
+        self.assertEqual(len(response.data['results']), 6)
@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient, RecipeIngredient, Tag
+from recipes.tests.factories import create_recipes, create_user
+
+
+class RecipeIngredientsUpdateTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+        cls.tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        cls.salt, cls.sugar, cls.flour = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('Соль', 'Сахар', 'Мука'))
+        cls.recipe, = create_recipes(
+            [cls.author], 1, [cls.tag], [cls.salt, cls.sugar])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.author)
+        self.rows = dict(
+            self.recipe.recipe.values_list('ingredient_id', 'id'))
+
+    def patch(self, ingredients, tags=None):
+        return self.client.patch(
+            f'/api/recipes/{self.recipe.id}/', {
+                'ingredients': [
+                    {'id': ingredient.id, 'amount': amount}
+                    for ingredient, amount in ingredients],
+                'tags': tags or [self.tag.id],
+            }, format='json')
+
+    def get_amounts(self):
+        return dict(self.recipe.recipe.values_list('ingredient_id', 'amount'))
+
+    def test_diff_update(self):
+        response = self.patch([(self.salt, 1), (self.sugar, 4)])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            self.get_amounts(), {self.salt.id: 1, self.sugar.id: 4})
+        response = self.patch([(self.sugar, 4), (self.flour, 2)])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            self.get_amounts(), {self.sugar.id: 4, self.flour.id: 2})
+        # Сохранившиеся позиции обновляются на месте, а не пересоздаются.
+        self.assertEqual(
+            RecipeIngredient.objects.get(
+                recipe=self.recipe, ingredient=self.sugar).id,
+            self.rows[self.sugar.id])
+
+    def test_query_counts(self):
+        # Без изменений ингредиентов: рецепт, теги, проверка id, savepoint,
+        # позиции рецепта, корзины, теги рецепта, UPDATE рецепта, release и
+        # три запроса ответа. Изменение количества и новая позиция добавляют
+        # по одному запросу, удаление - выборку удаляемых строк и DELETE.
+        # На Postgres после сохранения пересчитывается search_vector.
+        search = int(connection.vendor == 'postgresql')
+        for name, ingredients, queries in (
+                ('unchanged', [(self.salt, 1), (self.sugar, 1)], 12),
+                ('amount', [(self.salt, 3), (self.sugar, 1)], 13),
+                ('removed', [(self.salt, 3)], 14),
+                ('added', [(self.salt, 3), (self.flour, 1)], 13)):
+            with self.subTest(name), self.assertNumQueries(queries + search):
+                response = self.patch(ingredients)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(self.get_amounts(), {
+                ingredient.id: amount for ingredient, amount in ingredients})
+
+    def test_unknown_ids_are_rejected(self):
+        for ingredients, tags, field in (
+                ([(self.salt, 1), (Ingredient(id=0), 1)], None,
+                 'ingredients'),
+                ([(self.salt, 1)], [self.tag.id, 0], 'tags')):
+            with self.subTest(field=field):
+                response = self.patch(ingredients, tags)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('[0]', str(response.data[field]))
+        self.assertEqual(
+            self.get_amounts(), {self.salt.id: 1, self.sugar.id: 1})
@@ -0,0 +1,76 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite
+from recipes.tests.factories import create_recipes, create_user
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica_1'],
+    DATABASE_ROUTERS=['foodgram.routers.ReplicaRouter'],
+    MIDDLEWARE=[*settings.MIDDLEWARE, 'foodgram.routers.ReplicaMiddleware'])
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {'default', 'replica_1'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(0)
+        self.recipe, = create_recipes([self.user], 1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def request(self, method, url):
+        primary = CaptureQueriesContext(connections['default'])
+        replica = CaptureQueriesContext(connections['replica_1'])
+        with primary, replica:
+            response = getattr(self.client, method)(url)
+        return response, len(primary), len(replica)
+
+    def read(self):
+        response, primary, replica = self.request('get', '/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        return primary, replica
+
+    def test_reads_go_to_replica(self):
+        primary, replica = self.read()
+        self.assertGreater(replica, 0)
+        # force_authenticate не читает пользователя из БД, поэтому все
+        # запросы списка идут на реплику.
+        self.assertEqual(primary, 0)
+
+    def test_writes_go_to_primary(self):
+        response, primary, replica = self.request(
+            'post', f'/api/recipes/{self.recipe.id}/favorite/')
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        self.assertTrue(Favorite.objects.filter(
+            user=self.user, recipe=self.recipe).exists())
+
+    def test_successful_write_sticks_to_primary(self):
+        self.client.post(f'/api/recipes/{self.recipe.id}/favorite/')
+        primary, replica = self.read()
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_failed_write_does_not_stick(self):
+        response, _, _ = self.request('post', '/api/recipes/0/favorite/')
+        self.assertEqual(response.status_code, 404)
+        primary, replica = self.read()
+        self.assertGreater(replica, 0)
+        self.assertEqual(primary, 0)
+
+    def test_stickiness_expires(self):
+        self.client.post(f'/api/recipes/{self.recipe.id}/favorite/')
+        expired = time.time() + settings.REPLICA_STICKY_SECONDS + 1
+        with mock.patch('time.time', return_value=expired):
+            primary, replica = self.read()
+        self.assertGreater(replica, 0)
+        self.assertEqual(primary, 0)
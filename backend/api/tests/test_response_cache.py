@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from recipes.models import Recipe
+from recipes.tests.factories import create_recipes, create_user
+
+
+class ResponseCacheTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        recipe, = create_recipes([create_user(1)], 1)
+        Recipe.objects.filter(id=recipe.id).update(image='recipe/image.png')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_image(self, host, secure=False):
+        response = self.client.get(
+            '/api/recipes/', HTTP_HOST=host, secure=secure)
+        return response.data['results'][0]['image']
+
+    def test_key_includes_scheme_and_host(self):
+        self.assertEqual(
+            self.get_image('one.example.com'),
+            'http://one.example.com/media/recipe/image.png')
+        self.assertEqual(
+            self.get_image('two.example.com'),
+            'http://two.example.com/media/recipe/image.png')
+        self.assertEqual(
+            self.get_image('one.example.com', secure=True),
+            'https://one.example.com/media/recipe/image.png')
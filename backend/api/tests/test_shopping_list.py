@@ -0,0 +1,143 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from api.shopping_list import (OUTPUTS, evict_cached_files, get_cache_key,
+                               open_cached_file)
+from recipes.models import Ingredient, Tag
+from recipes.services import get_shopping_list
+from recipes.tests.factories import create_recipes, create_user
+
+
+class ShoppingListDeltaTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+        cls.buyer = create_user(1)
+        cls.tag = Tag.objects.create(
+            name='Тег', color='#000000', slug='tag')
+        cls.salt, cls.sugar, cls.flour = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('Соль', 'Сахар', 'Мука'))
+        cls.soup, cls.cake = create_recipes(
+            [cls.author], 2, [cls.tag], [cls.salt, cls.sugar])
+
+    def setUp(self):
+        cache.clear()
+
+    def get_list(self, user=None):
+        return dict(get_shopping_list(user or self.buyer).values_list(
+            'ingredient__name', 'amount'))
+
+    def cart(self, method, recipe):
+        self.client.force_authenticate(self.buyer)
+        response = getattr(self.client, method)(
+            f'/api/recipes/{recipe.id}/shopping_cart/')
+        self.assertIn(response.status_code, (201, 204), response.content)
+
+    def test_add_and_remove(self):
+        self.cart('post', self.soup)
+        self.cart('post', self.cake)
+        self.assertEqual(self.get_list(), {'Соль': 2, 'Сахар': 2})
+        self.cart('delete', self.soup)
+        self.assertEqual(self.get_list(), {'Соль': 1, 'Сахар': 1})
+        self.cart('delete', self.cake)
+        self.assertEqual(self.get_list(), {})
+
+    def test_emptied_items_are_not_downloaded(self):
+        self.cart('post', self.soup)
+        self.cart('delete', self.soup)
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/?output=txt')
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            'Cписок покупок пуст.\n')
+        self.cart('post', self.soup)
+        self.assertEqual(self.get_list(), {'Соль': 1, 'Сахар': 1})
+
+    def test_edit_recipe_in_cart(self):
+        self.cart('post', self.soup)
+        self.cart('post', self.cake)
+        self.client.force_authenticate(self.author)
+        response = self.client.patch(
+            f'/api/recipes/{self.soup.id}/', {
+                'ingredients': [
+                    {'id': self.salt.id, 'amount': 5},
+                    {'id': self.flour.id, 'amount': 3}],
+                'tags': [self.tag.id],
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            self.get_list(), {'Соль': 6, 'Сахар': 1, 'Мука': 3})
+        self.assertEqual(self.get_list(self.author), {})
+
+
+class ShoppingListDownloadTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        cls.soup, cls.cake = create_recipes([cls.user], 2, (), [salt])
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = self.settings(SHOPPING_LIST_CACHE_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client.force_authenticate(self.user)
+        self.client.post(f'/api/recipes/{self.soup.id}/shopping_cart/')
+
+    def download(self, **headers):
+        return self.client.get(
+            '/api/recipes/download_shopping_cart/?output=txt', **headers)
+
+    def test_not_modified(self):
+        response = self.download()
+        self.assertEqual(response.status_code, 200)
+        response.getvalue()
+        response = self.download(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.client.post(f'/api/recipes/{self.cake.id}/shopping_cart/')
+        response = self.download(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Соль - 2 г.', response.getvalue().decode())
+
+    def test_unchanged_list_is_not_rebuilt(self):
+        content_type, render = OUTPUTS['txt']
+        render = mock.Mock(wraps=render)
+        with mock.patch.dict(OUTPUTS, txt=(content_type, render)):
+            first = self.download().getvalue()
+            self.assertEqual(self.download().getvalue(), first)
+            self.assertEqual(render.call_count, 1)
+            self.client.post(f'/api/recipes/{self.cake.id}/shopping_cart/')
+            self.assertNotEqual(self.download().getvalue(), first)
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_oldest_files_are_evicted_over_budget(self):
+        paths = []
+        for amount in range(1, 4):
+            items = [{
+                'ingredient_id': 1, 'ingredient__name': 'Соль',
+                'ingredient__measurement_unit': 'г', 'amount': amount}]
+            key = get_cache_key(items, 'txt')
+            open_cached_file(items, key, 'txt').close()
+            path = os.path.join(self.directory, f'{key}.txt')
+            os.utime(path, (amount, amount))
+            paths.append((items, key, path))
+        # Повторное чтение самого старого файла делает его самым свежим.
+        items, key, _ = paths[0]
+        open_cached_file(items, key, 'txt').close()
+        size = os.path.getsize(paths[0][2])
+        with self.settings(SHOPPING_LIST_CACHE_MAX_SIZE=size * 2):
+            evict_cached_files()
+        self.assertEqual(
+            [os.path.exists(path) for _, _, path in paths],
+            [True, False, True])
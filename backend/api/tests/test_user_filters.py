@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from recipes.models import CartItem, Favorite, Recipe
+from recipes.tests.factories import create_recipes, create_user
+from recipes.tests.plans import explain, postgresql_only
+
+
+class UserRecipesFilterTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.author = create_user(1)
+        cls.recipes = create_recipes([cls.author], 6)
+        for recipe in cls.recipes[:2]:
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+        for recipe in cls.recipes[2:5]:
+            CartItem.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.estimate = int(connection.vendor == 'postgresql')
+
+    def get_ids(self, number, query):
+        with self.assertNumQueries(number):
+            response = self.client.get(f'/api/recipes/?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return {recipe['id'] for recipe in response.data['results']}
+
+    def test_is_favorited(self):
+        self.client.force_authenticate(self.user)
+        # count, страница, теги, ингредиенты, подписки, избранное, корзина;
+        # у отфильтрованного списка оценки числа строк из pg_class нет.
+        self.assertEqual(
+            self.get_ids(7, 'is_favorited=1'),
+            {recipe.id for recipe in self.recipes[:2]})
+        self.assertEqual(
+            self.get_ids(7, 'is_favorited=0'),
+            {recipe.id for recipe in self.recipes[2:]})
+
+    def test_is_in_shopping_cart(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(
+            self.get_ids(7, 'is_in_shopping_cart=1'),
+            {recipe.id for recipe in self.recipes[2:5]})
+        self.assertEqual(
+            self.get_ids(7, 'is_in_shopping_cart=0'),
+            {recipe.id for recipe in self.recipes[:2] + self.recipes[5:]})
+
+    def test_anonymous(self):
+        for name in ('is_favorited', 'is_in_shopping_cart'):
+            with self.subTest(name=name):
+                cache.clear()
+                self.assertEqual(self.get_ids(0, f'{name}=1'), set())
+                self.assertEqual(
+                    self.get_ids(4 + self.estimate, f'{name}=0'),
+                    {recipe.id for recipe in self.recipes})
+
+    @postgresql_only
+    def test_plans_use_user_indexes(self):
+        for model, indexes in (
+                (Favorite, ('unique_favorite', 'favorite_user_created_idx')),
+                (CartItem,
+                 ('unique_cart_item', 'cart_item_user_created_idx'))):
+            with self.subTest(model=model.__name__):
+                plan = explain(Recipe.objects.filter(
+                    id__in=model.objects.filter(
+                        user=self.user).values('recipe_id')))
+                self.assertTrue(
+                    any(index in plan for index in indexes), plan)
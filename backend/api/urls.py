@@ -1,9 +1,13 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import make_async_urls
+
 from .views import (AddAndDeleteSubscribe, AddDeleteFavoriteRecipe,
                     AddDeleteShoppingCart, AuthToken, IngredientsViewSet,
-                    RecipesViewSet, TagsViewSet, UsersViewSet, set_password)
+                    RecipesViewSet, TagsViewSet, UsersViewSet,
+                    query_profile, response_cache_stats, set_password)
 
 app_name = 'api'
 
@@ -15,13 +19,21 @@ router.register('users', UsersViewSet)
 
 
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(
+        make_async_urls(router.urls) if settings.ASYNC_VIEWS
+        else router.urls)),
     path('auth/token/login/',
          AuthToken.as_view(),
          name='login'),
     path('recipes/<int:recipe_id>/favorite/',
          AddDeleteFavoriteRecipe.as_view(),
          name='favorite_recipe'),
+    path('profiling/',
+         query_profile,
+         name='query_profile'),
+    path('cache/',
+         response_cache_stats,
+         name='response_cache_stats'),
     path('users/set_password/',
          set_password,
          name='set_password'),
@@ -1,29 +1,36 @@
-import io
-
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
-from django.db.models.aggregates import Count, Sum
+from django.db import transaction
 from django.db.models.expressions import Exists, OuterRef, Value
-from django.http import FileResponse
+from django.http import FileResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
 from djoser.views import UserViewSet
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 from rest_framework import generics, status, viewsets
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import (action, api_view,
+                                       permission_classes)
 from rest_framework.permissions import (SAFE_METHODS, AllowAny,
-                                        IsAuthenticated)
+                                        IsAdminUser, IsAuthenticated)
 from rest_framework.response import Response
 
 from .filters import IngredientFilter, RecipeFilter
+from .profiling import profile_store
+from .response_cache import response_cache
+from .paginations import RecipePagination, SubscribePagination
 from .permissions import IsAdminOrAuthorOrReadOnly
-from .mixins import PermissionAndPaginationMixin, GetObjectMixin
-from recipes.models import (FavoriteRecipe, Ingredient, Recipe, ShoppingCart,
-                            Subscribe, Tag)
-from .serializers import (IngredientSerializer, RecipeReadSerializer,
+from .mixins import (AnonymousCacheMixin, PermissionAndPaginationMixin,
+                     GetObjectMixin, ReplicaReadMixin,
+                     SubscribeQuerysetMixin)
+from .shopping_list import OUTPUTS, get_cache_key, open_cached_file
+from recipes.models import CartItem, Favorite, Ingredient, Recipe, Tag
+from recipes.bulk import export_recipes, import_recipes
+from recipes.ingredient_index import ingredient_index
+from recipes.services import (add_to_shopping_list, change_counter,
+                              get_shopping_list, remove_from_shopping_list)
+from .serializers import (RECIPE_PREFETCHES,
+                          IngredientSerializer, RecipeReadSerializer,
                           RecipeWriteSerializer,
                           SubscribeSerializer, TagSerializer)
 from users.serializers import (TokenSerializer, ListUserSerializer,
@@ -33,19 +40,14 @@ User = get_user_model()
 
 
 class AddAndDeleteSubscribe(
+        SubscribeQuerysetMixin,
         generics.RetrieveDestroyAPIView,
         generics.ListCreateAPIView):
 
     serializer_class = SubscribeSerializer
 
     def get_queryset(self):
-        return self.request.user.follower.select_related(
-            'following'
-        ).prefetch_related(
-            'following__recipe'
-        ).annotate(
-            recipes_count=Count('following__recipe'),
-            is_subscribed=Value(True),)
+        return self.get_subscribe_queryset()
 
     def get_object(self):
         user_id = self.kwargs['user_id']
@@ -64,7 +66,8 @@ class AddAndDeleteSubscribe(
                 {'errors': 'Вы уже подписаны.'},
                 status=status.HTTP_400_BAD_REQUEST)
         subs = request.user.follower.create(author=instance)
-        serializer = self.get_serializer(subs)
+        serializer = self.get_serializer(
+            self.get_queryset().get(id=subs.id))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def perform_destroy(self, instance):
@@ -76,14 +79,21 @@ class AddDeleteFavoriteRecipe(
         generics.RetrieveDestroyAPIView,
         generics.ListCreateAPIView):
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         instance = self.get_object()
-        request.user.favorite_recipe.recipe.add(instance)
+        _, created = request.user.favorites.get_or_create(recipe=instance)
+        if created:
+            change_counter(instance, 'favorites_count', 1)
         serializer = self.get_serializer(instance)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @transaction.atomic
     def perform_destroy(self, instance):
-        self.request.user.favorite_recipe.recipe.remove(instance)
+        deleted, _ = self.request.user.favorites.filter(
+            recipe=instance).delete()
+        if deleted:
+            change_counter(instance, 'favorites_count', -1)
 
 
 class AddDeleteShoppingCart(
@@ -91,14 +101,23 @@ class AddDeleteShoppingCart(
         generics.RetrieveDestroyAPIView,
         generics.ListCreateAPIView):
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         instance = self.get_object()
-        request.user.shopping_cart.recipe.add(instance)
+        _, created = request.user.cart_items.get_or_create(recipe=instance)
+        if created:
+            change_counter(instance, 'in_carts_count', 1)
+            add_to_shopping_list(request.user, instance)
         serializer = self.get_serializer(instance)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @transaction.atomic
     def perform_destroy(self, instance):
-        self.request.user.shopping_cart.recipe.remove(instance)
+        deleted, _ = self.request.user.cart_items.filter(
+            recipe=instance).delete()
+        if deleted:
+            change_counter(instance, 'in_carts_count', -1)
+            remove_from_shopping_list(self.request.user, instance)
 
 
 class AuthToken(ObtainAuthToken):
@@ -115,19 +134,12 @@ class AuthToken(ObtainAuthToken):
             status=status.HTTP_201_CREATED)
 
 
-class UsersViewSet(UserViewSet):
+class UsersViewSet(ReplicaReadMixin, SubscribeQuerysetMixin, UserViewSet):
     serializer_class = ListUserSerializer
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
-        return User.objects.annotate(
-            is_subscribed=Exists(
-                self.request.user.follower.filter(
-                    author=OuterRef('id'))
-            )).prefetch_related(
-            'follower', 'following'
-        ) if self.request.user.is_authenticated else User.objects.annotate(
-            is_subscribed=Value(False))
+        return User.objects.all()
 
     def get_serializer_class(self):
         if self.request.method.lower() == 'post':
@@ -140,20 +152,25 @@ class UsersViewSet(UserViewSet):
 
     @action(
         detail=False,
-        permission_classes=(IsAuthenticated,))
+        permission_classes=(IsAuthenticated,),
+        pagination_class=SubscribePagination)
     def subscriptions(self, request):
-        user = request.user
-        queryset = Subscribe.objects.filter(user=user)
-        pages = self.paginate_queryset(queryset)
+        pages = self.paginate_queryset(self.get_subscribe_queryset())
         serializer = SubscribeSerializer(
             pages, many=True,
             context={'request': request})
         return self.get_paginated_response(serializer.data)
 
 
-class RecipesViewSet(viewsets.ModelViewSet):
+class RecipesViewSet(
+        ReplicaReadMixin,
+        AnonymousCacheMixin,
+        viewsets.ModelViewSet):
+
     queryset = Recipe.objects.all()
+    cache_scope = 'recipes'
     filterset_class = RecipeFilter
+    pagination_class = RecipePagination
     permission_classes = (IsAdminOrAuthorOrReadOnly,)
 
     def get_serializer_class(self):
@@ -162,23 +179,26 @@ class RecipesViewSet(viewsets.ModelViewSet):
         return RecipeWriteSerializer
 
     def get_queryset(self):
-        return Recipe.objects.annotate(
+        queryset = Recipe.objects.select_related('author')
+        if self.action == 'list':
+            # Поля пользователя и вложенные данные списка добавляет
+            # RecipeListSerializer, без аннотаций COUNT(*) остается простым.
+            return queryset
+        queryset = queryset.annotate(
             is_favorited=Exists(
-                FavoriteRecipe.objects.filter(
+                Favorite.objects.filter(
                     user=self.request.user, recipe=OuterRef('id'))),
             is_in_shopping_cart=Exists(
-                ShoppingCart.objects.filter(
+                CartItem.objects.filter(
                     user=self.request.user,
                     recipe=OuterRef('id')))
-        ).select_related('author').prefetch_related(
-            'ingredients', 'recipe',
-            'shopping_cart', 'favorite_recipe', 'tags'
-        ) if self.request.user.is_authenticated else Recipe.objects.annotate(
+        ) if self.request.user.is_authenticated else queryset.annotate(
             is_in_shopping_cart=Value(False),
             is_favorited=Value(False),
-        ).select_related('author').prefetch_related(
-            'ingredients', 'recipe',
-            'shopping_cart', 'favorite_recipe', 'tags')
+        )
+        if self.action == 'retrieve':
+            return queryset.prefetch_related(*RECIPE_PREFETCHES)
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -188,59 +208,79 @@ class RecipesViewSet(viewsets.ModelViewSet):
         methods=['get'],
         permission_classes=(IsAuthenticated,))
     def download_shopping_cart(self, request):
-        buf = io.BytesIO()
-        page = canvas.Canvas(buf)
-        pdfmetrics.registerFont(TTFont('Vera', 'Vera.ttf'))
-        x, y = 50, 800
-        shopping_cart = (
-            request.user.shopping_cart.recipe.
-            values(
-                'ingredients__name',
-                'ingredients__measurement_unit'
-            ).annotate(amount=Sum('recipe__amount')).order_by())
-        page.setFont('Vera', 14)
-        if shopping_cart:
-            indentation = 20
-            page.drawString(x, y, 'Cписок покупок:')
-            for index, recipe in enumerate(shopping_cart, start=1):
-                page.drawString(
-                    x, y - indentation,
-                    f'{index}. {recipe["ingredients__name"]} - '
-                    f'{recipe["amount"]} '
-                    f'{recipe["ingredients__measurement_unit"]}.')
-                y -= 15
-                if y <= 50:
-                    page.showPage()
-                    y = 800
-            page.save()
-            buf.seek(0)
-            return FileResponse(
-                buf, as_attachment=True, filename='shoppinglist.pdf')
-        page.setFont('Vera', 24)
-        page.drawString(
-            x, y, 'Cписок покупок пуст.'
-        )
-        page.save()
-        buf.seek(0)
-        return FileResponse(buf,
-                            as_attachment=True,
-                            filename='shoppinglist.pdf')
+        shopping_list = list(get_shopping_list(request.user).values(
+            'ingredient_id',
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            'amount'))
+        output = request.query_params.get('output', 'pdf')
+        if output not in OUTPUTS:
+            output = 'pdf'
+        key = get_cache_key(shopping_list, output)
+        etag = f'"{key}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type, _ = OUTPUTS[output]
+            response = FileResponse(
+                open_cached_file(shopping_list, key, output),
+                as_attachment=True,
+                filename=f'shoppinglist.{output}',
+                content_type=content_type)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='export',
+        permission_classes=(IsAdminUser,))
+    def bulk_export(self, request):
+        return StreamingHttpResponse(
+            export_recipes(self.filter_queryset(Recipe.objects.all())),
+            content_type='application/x-ndjson')
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        permission_classes=(IsAdminUser,))
+    def bulk_import(self, request):
+        created, errors = import_recipes(
+            request.stream or [],
+            default_author=request.user)
+        return Response(
+            {'created': created, 'errors': errors},
+            status=status.HTTP_201_CREATED if created
+            else status.HTTP_400_BAD_REQUEST)
 
 
 class IngredientsViewSet(
+        ReplicaReadMixin,
+        AnonymousCacheMixin,
         PermissionAndPaginationMixin,
         viewsets.ModelViewSet):
 
     queryset = Ingredient.objects.all()
+    cache_scope = 'ingredients'
     serializer_class = IngredientSerializer
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        return super().list(request, *args, **kwargs)
+
 
 class TagsViewSet(
+        ReplicaReadMixin,
+        AnonymousCacheMixin,
         PermissionAndPaginationMixin,
         viewsets.ModelViewSet):
 
     queryset = Tag.objects.all()
+    cache_scope = 'tags'
     serializer_class = TagSerializer
 
 
@@ -257,3 +297,18 @@ def set_password(request):
     return Response(
         {'error': 'Введены неверные данные.'},
         status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['get', 'delete'])
+@permission_classes([IsAdminUser])
+def query_profile(request):
+    if request.method == 'DELETE':
+        profile_store.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(profile_store.summary())
+
+
+@api_view(['get'])
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    return Response(response_cache.get_stats())
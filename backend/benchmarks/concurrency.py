@@ -0,0 +1,37 @@
+"""Задержки API при 50, 200 и 1000 одновременных клиентах.
+
+Сравнивает заранее запущенные серверы, например WSGI (gthread) и ASGI
+(uvicorn) с одинаковым GUNICORN_THREADS: под ASGI горячие view выполняются
+в пуле из ASYNC_VIEW_THREADS потоков, и соединений с БД не больше, чем
+под WSGI.
+
+    python -m benchmarks.concurrency \\
+        --target wsgi=http://127.0.0.1:8001/api/recipes/ \\
+        --target asgi=http://127.0.0.1:8002/api/recipes/ \\
+        [--clients 50 200 1000] [--requests 5] [--token TOKEN]
+"""
+import argparse
+
+from .load_test import load, parse_target
+from .utils import print_table
+
+CLIENTS = (50, 200, 1000)
+REQUESTS_PER_CLIENT = 5
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--target', type=parse_target, action='append', required=True)
+    parser.add_argument('--clients', type=int, nargs='+', default=CLIENTS)
+    parser.add_argument('--requests', type=int, default=REQUESTS_PER_CLIENT)
+    parser.add_argument('--token')
+    args = parser.parse_args()
+    print_table([
+        {'target': name, **load(url, clients, args.requests, args.token)}
+        for name, url in args.target
+        for clients in args.clients])
+
+
+if __name__ == '__main__':
+    main()
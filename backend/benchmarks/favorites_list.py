@@ -0,0 +1,135 @@
+"""Список рецептов при 1 млн записей в избранном: до и после user-011.
+
+"До" - аннотации Exists через контейнеры FavoriteRecipe/ShoppingCart и их
+скрытые M2M-таблицы, "после" - запросы текущего списка к Favorite и CartItem
+по составным индексам. Для каждого варианта измеряются страница ленты
+и страница "Избранное" с подсчетом количества.
+
+    python -m benchmarks.favorites_list [--favorites 1000000]
+"""
+import argparse
+import random
+
+from .utils import (create_test_database, measure, print_table,
+                    setup_django, summarize)
+
+RECIPES = 10000
+PAGE_SIZE = 6
+REPEAT = 50
+BATCH_SIZE = 50000
+
+
+def bulk_insert(model, objects):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+
+
+def populate(favorites, per_user):
+    from recipes.models import Favorite, FavoriteRecipe, Recipe
+    from users.models import User
+
+    users = favorites // per_user + 1
+    bulk_insert(User, (
+        User(id=number, email=f'user{number}@example.com',
+             username=f'user{number}', password='password')
+        for number in range(1, users + 1)))
+    bulk_insert(Recipe, (
+        Recipe(id=number, author_id=number % users + 1,
+               name=f'Рецепт {number}', text='Описание', cooking_time=10)
+        for number in range(1, RECIPES + 1)))
+    bulk_insert(FavoriteRecipe, (
+        FavoriteRecipe(id=number, user_id=number)
+        for number in range(1, users + 1)))
+    rows = [
+        (user_id, recipe_id)
+        for user_id in range(1, users + 1)
+        for recipe_id in random.Random(user_id).sample(
+            range(1, RECIPES + 1), per_user)]
+    bulk_insert(FavoriteRecipe.recipe.through, (
+        FavoriteRecipe.recipe.through(
+            favoriterecipe_id=user_id, recipe_id=recipe_id)
+        for user_id, recipe_id in rows))
+    bulk_insert(Favorite, (
+        Favorite(user_id=user_id, recipe_id=recipe_id)
+        for user_id, recipe_id in rows))
+    return User.objects.get(id=1)
+
+
+def get_legacy_queries(user):
+    from django.db.models import Exists, OuterRef
+
+    from recipes.models import FavoriteRecipe, Recipe, ShoppingCart
+
+    recipes = Recipe.objects.annotate(
+        is_favorited=Exists(FavoriteRecipe.objects.filter(
+            user=user, recipe=OuterRef('id'))),
+        is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+            user=user, recipe=OuterRef('id'))))
+    favorites = recipes.filter(is_favorited=True)
+    return {
+        'feed': lambda: (
+            recipes.count(), list(recipes[:PAGE_SIZE])),
+        'favorites': lambda: (
+            favorites.count(), list(favorites[:PAGE_SIZE])),
+    }
+
+
+def get_current_queries(user):
+    from recipes.models import Recipe
+
+    def load_page(recipes):
+        page = list(recipes[:PAGE_SIZE])
+        ids = [recipe.id for recipe in page]
+        # Оверлей RecipeListSerializer: избранное и корзина для страницы.
+        set(user.favorites.filter(
+            recipe_id__in=ids).values_list('recipe_id', flat=True))
+        set(user.cart_items.filter(
+            recipe_id__in=ids).values_list('recipe_id', flat=True))
+        return recipes.count(), page
+
+    favorites = Recipe.objects.filter(
+        id__in=user.favorites.values('recipe_id'))
+    return {
+        'feed': lambda: load_page(Recipe.objects.all()),
+        'favorites': lambda: load_page(favorites),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--favorites', type=int, default=1000000)
+    parser.add_argument('--per-user', type=int, default=100)
+    args = parser.parse_args()
+    setup_django()
+    from django.db import connection
+
+    destroy = create_test_database()
+    try:
+        user = populate(args.favorites, args.per_user)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        rows = []
+        for variant, get_queries in (
+                ('before', get_legacy_queries),
+                ('after', get_current_queries)):
+            for page, query in get_queries(user).items():
+                query()
+                rows.append({
+                    'variant': variant,
+                    'page': page,
+                    'favorites': args.favorites,
+                    **summarize(measure(query, REPEAT)),
+                })
+    finally:
+        destroy()
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
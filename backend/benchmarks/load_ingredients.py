@@ -0,0 +1,74 @@
+"""Масштабирование команды load_ingredients.
+
+Загружает поставляемый data/ingredients.csv и синтетические CSV на
+10 тыс., 100 тыс. и 1 млн строк, каждый размер - в отдельном процессе
+с пустой тестовой БД.
+
+    python -m benchmarks.load_ingredients [--sizes 10000 1000000]
+"""
+import argparse
+import csv
+import io
+import os
+import tempfile
+import time
+
+from .utils import (BACKEND_DIR, create_test_database, peak_rss_mb,
+                    print_case, print_table, run_case, setup_django)
+
+SIZES = (10000, 100000, 1000000)
+SHIPPED = os.path.join(BACKEND_DIR, 'data', 'ingredients.csv')
+
+
+def write_synthetic(size, file):
+    writer = csv.writer(file)
+    for number in range(size):
+        # Каждая десятая строка повторяется, чтобы работала дедупликация.
+        writer.writerow((f'Ингредиент {number - number % 10 // 9}', 'г'))
+
+
+def run(path, size):
+    setup_django()
+    from django.core.management import call_command
+
+    destroy = create_test_database()
+    try:
+        if path is None:
+            file = tempfile.NamedTemporaryFile(
+                'w', suffix='.csv', encoding='utf-8', delete=False)
+            with file:
+                write_synthetic(size, file)
+            path = file.name
+        start = time.perf_counter()
+        call_command('load_ingredients', path, stdout=io.StringIO())
+        elapsed = time.perf_counter() - start
+    finally:
+        destroy()
+    if path != SHIPPED:
+        os.remove(path)
+    print_case({
+        'rows': size,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(size / elapsed),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--case', nargs=2)
+    args = parser.parse_args()
+    if args.case:
+        path, size = args.case
+        run(None if path == '-' else path, int(size))
+        return
+    with open(SHIPPED, encoding='utf-8') as file:
+        shipped = sum(1 for _ in file)
+    print_table(
+        [run_case(__spec__.name, SHIPPED, shipped)]
+        + [run_case(__spec__.name, '-', size) for size in args.sizes])
+
+
+if __name__ == '__main__':
+    main()
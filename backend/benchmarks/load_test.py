@@ -0,0 +1,114 @@
+"""Нагрузочный тест: установка соединения с БД и задержки API.
+
+Сначала измеряется, сколько стоит новое соединение с БД из DB_* (его
+платит каждый запрос в DB_CONNECTION_MODE=direct) и проверка is_usable()
+постоянного соединения (persistent и pgbouncer). Затем каждая цель
+нагружается заданным числом параллельных клиентов. Серверы запускаются
+заранее, например с DB_CONNECTION_MODE=direct и persistent на разных портах:
+
+    python -m benchmarks.load_test \\
+        --target direct=http://127.0.0.1:8001/api/recipes/ \\
+        --target persistent=http://127.0.0.1:8002/api/recipes/ \\
+        [--clients 10 50] [--requests 20] [--token TOKEN]
+"""
+import argparse
+import threading
+import time
+
+import requests
+
+from .utils import measure, percentile, print_table, setup_django, summarize
+
+CLIENTS = (10, 50)
+REQUESTS_PER_CLIENT = 20
+CONNECT_REPEAT = 50
+
+
+def measure_connections(repeat=CONNECT_REPEAT):
+    setup_django()
+    from django.db import connection
+
+    def connect():
+        connection.get_new_connection(
+            connection.get_connection_params()).close()
+
+    connection.ensure_connection()
+    try:
+        return [
+            {'operation': 'connect', **summarize(measure(connect, repeat))},
+            {'operation': 'is_usable',
+             **summarize(measure(connection.is_usable, repeat))},
+        ]
+    finally:
+        connection.close()
+
+
+def run_client(url, headers, count, start, timings, errors):
+    with requests.Session() as session:
+        start.wait()
+        for _ in range(count):
+            began = time.perf_counter()
+            try:
+                response = session.get(url, headers=headers, timeout=60)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            timings.append((time.perf_counter() - began) * 1000)
+            if not ok:
+                errors.append(1)
+
+
+def load(url, clients, count, token=None):
+    headers = {'Authorization': f'Token {token}'} if token else {}
+    timings, errors = [], []
+    start = threading.Barrier(clients + 1)
+    threads = [
+        threading.Thread(
+            target=run_client,
+            args=(url, headers, count, start, timings, errors))
+        for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    return {
+        'clients': clients,
+        'rps': round(len(timings) / elapsed),
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'errors': len(errors),
+    }
+
+
+def parse_target(value):
+    name, _, url = value.partition('=')
+    if not url:
+        raise argparse.ArgumentTypeError('Ожидается имя=URL.')
+    return name, url
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--target', type=parse_target, action='append', default=[])
+    parser.add_argument('--clients', type=int, nargs='+', default=CLIENTS)
+    parser.add_argument('--requests', type=int, default=REQUESTS_PER_CLIENT)
+    parser.add_argument('--token')
+    parser.add_argument('--skip-connect', action='store_true')
+    args = parser.parse_args()
+    if not args.skip_connect:
+        print_table(measure_connections())
+        print()
+    rows = [
+        {'target': name, **load(url, clients, args.requests, args.token)}
+        for name, url in args.target
+        for clients in args.clients]
+    if rows:
+        print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
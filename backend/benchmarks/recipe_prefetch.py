@@ -0,0 +1,154 @@
+"""Память и число запросов списка и карточки рецепта на 6, 60 и 600 рецептах.
+
+"До" - прежний набор prefetch_related (ингредиенты дважды и контейнеры
+избранного и корзин всех пользователей), "после" - RECIPE_PREFETCHES.
+Для текущего кода дополнительно измеряются сами эндпоинты. Каждый
+размер - в отдельном процессе.
+
+    python -m benchmarks.recipe_prefetch [--sizes 6 60 600]
+"""
+import argparse
+import time
+import tracemalloc
+
+from .utils import (create_test_database, print_case, print_table,
+                    run_case, setup_django)
+
+SIZES = (6, 60, 600)
+INGREDIENTS_PER_RECIPE = 10
+TAGS = 3
+USERS = 20
+LEGACY_PREFETCHES = (
+    'ingredients', 'recipe', 'shopping_cart', 'favorite_recipe', 'tags')
+
+
+def populate(size):
+    from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
+                                RecipeIngredient, ShoppingCart, Tag)
+    from users.models import User
+
+    users = User.objects.bulk_create(
+        User(id=number, email=f'user{number}@example.com',
+             username=f'user{number}', password='x')
+        for number in range(1, USERS + 1))
+    tags = Tag.objects.bulk_create(
+        Tag(id=number, name=f'Тег {number}', color=f'#{number:06x}',
+            slug=f'tag{number}')
+        for number in range(1, TAGS + 1))
+    Ingredient.objects.bulk_create(
+        Ingredient(id=number, name=f'Ингредиент {number}',
+                   measurement_unit='г')
+        for number in range(1, INGREDIENTS_PER_RECIPE + 1))
+    recipes = Recipe.objects.bulk_create(
+        Recipe(id=number, author_id=number % USERS + 1,
+               name=f'Рецепт {number}', text='Описание', cooking_time=10)
+        for number in range(1, size + 1))
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient_id=number, amount=1)
+        for recipe in recipes
+        for number in range(1, INGREDIENTS_PER_RECIPE + 1))
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe=recipe, tag=tag)
+        for recipe in recipes for tag in tags)
+    for model in (FavoriteRecipe, ShoppingCart):
+        model.objects.bulk_create(
+            model(id=user.id, user=user) for user in users)
+        model.recipe.through.objects.bulk_create(
+            model.recipe.through(
+                **{f'{model._meta.model_name}_id': user.id,
+                   'recipe_id': recipe.id})
+            for user in users for recipe in recipes)
+    return users[0]
+
+
+def profile(func):
+    from django.db import connection
+
+    # queries_log сбрасывается в начале каждого запроса к API, поэтому
+    # запросы считаются обёрткой над выполнением SQL.
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    with connection.execute_wrapper(count):
+        func()
+    elapsed = (time.perf_counter() - start) * 1000
+    # Память - отдельным прогоном: tracemalloc в разы замедляет код.
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'queries': len(queries),
+        'ms': round(elapsed, 1),
+        'peak_kb': round(peak / 1024),
+    }
+
+
+def get_cases(user, size):
+    from django.core.cache import cache
+    from rest_framework.test import APIClient
+
+    from api.serializers import RECIPE_PREFETCHES
+    from recipes.models import Recipe
+
+    client = APIClient()
+    client.force_authenticate(user)
+    recipe_id = Recipe.objects.order_by('id').values_list('id', flat=True)[0]
+
+    def get(url):
+        cache.clear()
+        assert client.get(url).status_code == 200
+
+    recipes = Recipe.objects.select_related('author')
+    return (
+        ('before', 'list queryset', lambda: list(
+            recipes.prefetch_related(*LEGACY_PREFETCHES)[:size])),
+        ('after', 'list queryset', lambda: list(
+            recipes.prefetch_related(*RECIPE_PREFETCHES)[:size])),
+        ('before', 'detail queryset', lambda: recipes.prefetch_related(
+            *LEGACY_PREFETCHES).get(id=recipe_id)),
+        ('after', 'detail queryset', lambda: recipes.prefetch_related(
+            *RECIPE_PREFETCHES).get(id=recipe_id)),
+        ('after', 'list endpoint', lambda: get(
+            f'/api/recipes/?limit={size}')),
+        ('after', 'detail endpoint', lambda: get(
+            f'/api/recipes/{recipe_id}/')),
+    )
+
+
+def run(size):
+    setup_django()
+    destroy = create_test_database()
+    try:
+        user = populate(size)
+        rows = []
+        for variant, view, func in get_cases(user, size):
+            func()
+            rows.append({'variant': variant, 'view': view, **profile(func)})
+    finally:
+        destroy()
+    print_case({'recipes': size, 'rows': rows})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--case', type=int)
+    args = parser.parse_args()
+    if args.case:
+        run(args.case)
+        return
+    rows = []
+    for size in args.sizes:
+        case = run_case(__spec__.name, size)
+        rows.extend(
+            {'recipes': case['recipes'], **row} for row in case['rows'])
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Задержка и пиковый RSS выгрузки списка покупок в PDF.
+
+Сравнивает прежнюю отрисовку (регистрация шрифта на каждый запрос,
+документ в BytesIO, drawString на каждую строку) с api.shopping_list.
+
+    python -m benchmarks.shopping_list_pdf [--sizes 10 100 1000]
+"""
+import argparse
+import io
+import tempfile
+
+from .utils import (measure, peak_rss_mb, print_case, print_table, run_case,
+                    setup_django, summarize)
+
+SIZES = (10, 100, 1000)
+REPEAT = 20
+
+
+def get_items(size):
+    return [
+        {
+            'ingredient_id': number,
+            'ingredient__name': f'Ингредиент {number}',
+            'ingredient__measurement_unit': 'г',
+            'amount': number,
+        } for number in range(size)]
+
+
+def render_legacy(items):
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    page = canvas.Canvas(buffer)
+    pdfmetrics.registerFont(TTFont('Vera', 'Vera.ttf'))
+    x, y = 50, 800
+    page.setFont('Vera', 14)
+    page.drawString(x, y, 'Cписок покупок:')
+    for index, item in enumerate(items, start=1):
+        page.drawString(
+            x, y - 20,
+            f'{index}. {item["ingredient__name"]} - {item["amount"]} '
+            f'{item["ingredient__measurement_unit"]}.')
+        y -= 15
+        if y <= 50:
+            page.showPage()
+            y = 800
+    page.save()
+    return buffer.getvalue()
+
+
+def render_streaming(items):
+    from api.shopping_list import render_pdf
+
+    with tempfile.TemporaryFile() as file:
+        render_pdf(items, file)
+        return file.tell()
+
+
+RENDERERS = {'legacy': render_legacy, 'streaming': render_streaming}
+
+
+def run(renderer, size):
+    setup_django()
+    items = get_items(size)
+    render = RENDERERS[renderer]
+    first = measure(lambda: render(items), 1)[0]
+    timings = measure(lambda: render(items), REPEAT)
+    print_case({
+        'renderer': renderer,
+        'lines': size,
+        'first_ms': round(first, 2),
+        **summarize(timings),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--case', nargs=2)
+    args = parser.parse_args()
+    if args.case:
+        renderer, size = args.case
+        run(renderer, int(size))
+        return
+    print_table([
+        run_case(__spec__.name, renderer, size)
+        for size in args.sizes for renderer in RENDERERS])
+
+
+if __name__ == '__main__':
+    main()
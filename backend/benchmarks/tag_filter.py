@@ -0,0 +1,115 @@
+"""Стоимость фильтра ?tags= при росте числа рецептов и тегов.
+
+"До" - прежний AllValuesMultipleFilter: SELECT DISTINCT slug для выбора
+и фильтр через join tags__slug с DISTINCT. "После" - карта тегов из кеша
+и Exists по таблице связей. Каждый размер - в отдельном процессе.
+
+    python -m benchmarks.tag_filter [--sizes 1000:10 100000:1000]
+"""
+import argparse
+
+from .utils import (create_test_database, measure, print_case, print_table,
+                    run_case, setup_django, summarize)
+
+SIZES = ('1000:10', '10000:100', '100000:1000')
+TAGS_PER_RECIPE = 3
+SELECTED_TAGS = 2
+PAGE_SIZE = 6
+REPEAT = 50
+BATCH_SIZE = 50000
+
+
+def populate(recipes, tags):
+    from recipes.models import Recipe, Tag
+    from users.models import User
+
+    User.objects.create(
+        id=1, email='user@example.com', username='user', password='x')
+    Tag.objects.bulk_create(
+        Tag(id=number, name=f'Тег {number}', color=f'#{number:06x}',
+            slug=f'tag{number}')
+        for number in range(1, tags + 1))
+    for start in range(1, recipes + 1, BATCH_SIZE):
+        numbers = range(start, min(start + BATCH_SIZE, recipes + 1))
+        Recipe.objects.bulk_create(
+            Recipe(id=number, author_id=1, name=f'Рецепт {number}',
+                   text='Описание', cooking_time=10)
+            for number in numbers)
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(
+                recipe_id=number, tag_id=(number + shift) % tags + 1)
+            for number in numbers for shift in range(TAGS_PER_RECIPE))
+
+
+def get_legacy_query(slugs):
+    from django.db.models import Q
+
+    from recipes.models import Recipe
+
+    def query():
+        list(Recipe.objects.distinct().order_by('tags__slug').values_list(
+            'tags__slug', flat=True))
+        condition = Q()
+        for slug in slugs:
+            condition |= Q(tags__slug=slug)
+        recipes = Recipe.objects.filter(condition).distinct()
+        return recipes.count(), list(recipes[:PAGE_SIZE])
+
+    return query
+
+
+def get_current_query(slugs):
+    from api.filters import TagsFilter
+    from recipes.models import Recipe
+
+    tags_filter = TagsFilter(field_name='tags__slug')
+
+    def query():
+        recipes = tags_filter.filter(Recipe.objects.all(), slugs)
+        return recipes.count(), list(recipes[:PAGE_SIZE])
+
+    return query
+
+
+def run(recipes, tags):
+    setup_django()
+    from django.db import connection
+
+    destroy = create_test_database()
+    try:
+        populate(recipes, tags)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        slugs = [f'tag{number}' for number in range(1, SELECTED_TAGS + 1)]
+        results = {}
+        for variant, get_query in (
+                ('before', get_legacy_query), ('after', get_current_query)):
+            query = get_query(slugs)
+            query()
+            results[variant] = summarize(measure(query, REPEAT))
+    finally:
+        destroy()
+    print_case({'recipes': recipes, 'tags': tags, 'results': results})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', nargs='+', default=SIZES)
+    parser.add_argument('--case', nargs=2)
+    args = parser.parse_args()
+    if args.case:
+        run(*map(int, args.case))
+        return
+    rows = []
+    for size in args.sizes:
+        case = run_case(__spec__.name, *size.split(':'))
+        rows.extend(
+            {'recipes': case['recipes'], 'tags': case['tags'],
+             'variant': variant, **timings}
+            for variant, timings in case['results'].items())
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.test_settings')
+    import django
+
+    django.setup()
+
+
+def create_test_database():
+    """Создает отдельную тестовую БД и возвращает функцию ее удаления."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    return lambda: connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def summarize(timings):
+    return {
+        'mean_ms': round(statistics.mean(timings), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+    }
+
+
+def run_case(module, *args):
+    """Запускает случай в отдельном процессе, чтобы пиковый RSS был честным.
+
+    Процесс печатает результат последней строкой в формате JSON.
+    """
+    result = subprocess.run(
+        [sys.executable, '-m', module, '--case', *map(str, args)],
+        cwd=BACKEND_DIR, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_case(result):
+    print(json.dumps(result, ensure_ascii=False))
+
+
+def print_table(rows):
+    columns = list(rows[0])
+    widths = [
+        max(len(str(column)), *(len(str(row[column])) for row in rows))
+        for column in columns]
+    print('  '.join(
+        str(column).ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(
+            str(row[column]).ljust(width)
+            for column, width in zip(columns, widths)))
@@ -0,0 +1,25 @@
+from time import monotonic
+
+from django.conf import settings
+from django.db import connections
+
+
+def close_unusable_connections(**kwargs):
+    # is_usable() - лишний запрос к БД, поэтому проверяются только
+    # соединения, простаивавшие дольше DB_CONN_HEALTH_CHECK_IDLE секунд.
+    if not settings.DB_CONN_HEALTH_CHECKS:
+        return
+    now = monotonic()
+    for connection in connections.all():
+        if (connection.connection is not None
+                and now - getattr(connection, 'released_at', 0)
+                > settings.DB_CONN_HEALTH_CHECK_IDLE
+                and not connection.is_usable()):
+            connection.close()
+
+
+def mark_connections_released(**kwargs):
+    now = monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.released_at = now
@@ -0,0 +1,51 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+use_replica = ContextVar('use_replica', default=False)
+
+
+def get_sticky_key(user):
+    return f'db_sticky:{user.id}'
+
+
+def is_sticky(user):
+    return (
+        user.is_authenticated
+        and cache.get(get_sticky_key(user)) is not None)
+
+
+def stick_to_primary(user):
+    cache.set(get_sticky_key(user), 1, settings.REPLICA_STICKY_SECONDS)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if use_replica.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaMiddleware(MiddlewareMixin):
+
+    def process_request(self, request):
+        use_replica.set(False)
+
+    def process_response(self, request, response):
+        use_replica.set(False)
+        user = getattr(request, 'user', None)
+        if (request.method not in SAFE_METHODS and response.status_code < 400
+                and user is not None and user.is_authenticated):
+            stick_to_primary(user)
+        return response
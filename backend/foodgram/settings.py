@@ -1,3 +1,4 @@
+import itertools
 import os
 from dotenv import load_dotenv
 
@@ -53,6 +54,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+QUERY_PROFILING = os.getenv('QUERY_PROFILING', 'False') == 'True'
+QUERY_PROFILING_SAMPLE_RATE = float(
+    os.getenv('QUERY_PROFILING_SAMPLE_RATE', 0.05))
+QUERY_PROFILING_WINDOW = int(os.getenv('QUERY_PROFILING_WINDOW', 500))
+
+if QUERY_PROFILING:
+    MIDDLEWARE.insert(0, 'api.profiling.QueryProfilingMiddleware')
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -73,6 +82,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASGI_APPLICATION = 'foodgram.asgi.application'
+
+ASYNC_VIEWS = os.getenv('SERVER_MODE', 'wsgi') == 'asgi'
+# Потоков для горячих view под ASGI столько же, сколько потоков воркера
+# под WSGI, бюджет соединений с БД от режима не зависит.
+ASYNC_VIEW_THREADS = int(os.getenv('GUNICORN_THREADS', 1))
+
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
@@ -87,6 +103,40 @@ DATABASES = {
     }
 }
 
+# direct - соединение на запрос, persistent - постоянные соединения,
+# pgbouncer - постоянные соединения к pgbouncer в режиме transaction.
+DB_CONNECTION_MODE = os.getenv('DB_CONNECTION_MODE', 'direct')
+DB_CONN_HEALTH_CHECKS = DB_CONNECTION_MODE != 'direct'
+DB_CONN_HEALTH_CHECK_IDLE = int(os.getenv('DB_CONN_HEALTH_CHECK_IDLE', 5))
+if DB_CONNECTION_MODE != 'direct':
+    DATABASES['default']['CONN_MAX_AGE'] = int(
+        os.getenv('DB_CONN_MAX_AGE', 60))
+if DB_CONNECTION_MODE == 'pgbouncer':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Реплики задаются списками через запятую в DB_REPLICA_HOSTS и
+# DB_REPLICA_NAMES; недостающие значения берутся из основной БД.
+DATABASE_REPLICAS = []
+for number, (host, name) in enumerate(itertools.zip_longest(*(
+        os.getenv(variable).split(',') if os.getenv(variable) else []
+        for variable in ('DB_REPLICA_HOSTS', 'DB_REPLICA_NAMES'))),
+        start=1):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'ENGINE': os.getenv(
+            'DB_REPLICA_ENGINE', DATABASES['default']['ENGINE']),
+        'HOST': (host or '').strip() or DATABASES['default']['HOST'],
+        'NAME': (name or '').strip() or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['foodgram.routers.ReplicaRouter']
+    MIDDLEWARE.append('foodgram.routers.ReplicaMiddleware')
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -127,6 +177,33 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+SHOPPING_LIST_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'shopping_lists')
+SHOPPING_LIST_CACHE_MAX_SIZE = int(
+    os.getenv('SHOPPING_LIST_CACHE_MAX_SIZE', 50 * 1024 * 1024))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+RESPONSE_CACHE_LOCAL_SIZE = int(os.getenv('RESPONSE_CACHE_LOCAL_SIZE', 256))
+
+RECIPE_FRAGMENT_TIMEOUT = int(os.getenv('RECIPE_FRAGMENT_TIMEOUT', 3600))
+TAG_MAP_TIMEOUT = int(os.getenv('TAG_MAP_TIMEOUT', 300))
+
+IMAGE_VARIANT_SIZES = (320, 640, 1280)
+IMAGE_JOB_MAX_ATTEMPTS = int(os.getenv('IMAGE_JOB_MAX_ATTEMPTS', 5))
+IMAGE_JOB_TIMEOUT = int(os.getenv('IMAGE_JOB_TIMEOUT', 300))
+
+PAGINATION_ESTIMATE_THRESHOLD = int(
+    os.getenv('PAGINATION_ESTIMATE_THRESHOLD', 100000))
+
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', 50))
+
 AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
@@ -140,4 +217,5 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'api.paginations.LimitPageNumberPagination',
 }
@@ -0,0 +1,30 @@
+import tempfile
+
+from .settings import *  # noqa: F401, F403
+from .settings import DATABASES, INSTALLED_APPS
+
+# Миграции создаются при развертывании, тестовая БД строится по моделям
+# всех приложений сразу, чтобы внешние ключи на auth создавались последними.
+MIGRATION_MODULES = {app.rsplit('.', 1)[-1]: None for app in INSTALLED_APPS}
+
+if not DATABASES['default']['ENGINE']:
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+
+# Зеркало тестовой БД для проверки маршрутизации чтения на реплики: тесты
+# включают его через override_settings(DATABASE_REPLICAS=...).
+DATABASES.setdefault(
+    'replica_1', {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}})
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-media-')
+SHOPPING_LIST_CACHE_DIR = tempfile.mkdtemp(prefix='foodgram-lists-')
@@ -0,0 +1,28 @@
+import os
+
+# Каждый поток воркера держит свое соединение с БД, поэтому при
+# DB_CONNECTION_MODE=persistent соединений будет workers * threads.
+# SERVER_MODE=asgi запускает foodgram.asgi в воркерах uvicorn: горячие view
+# выполняются в пуле из threads потоков, остальные синхронные view - в
+# одном общем потоке, то есть соединений workers * (threads + 1).
+asgi = os.getenv('SERVER_MODE', 'wsgi') == 'asgi'
+
+wsgi_app = 'foodgram.asgi:application' if asgi else 'foodgram.wsgi:application'
+bind = os.getenv('GUNICORN_BIND', '0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+worker_class = os.getenv(
+    'GUNICORN_WORKER_CLASS',
+    'uvicorn.workers.UvicornWorker' if asgi
+    else 'gthread' if threads > 1 else 'sync')
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# Версии закешированных ответов и фрагментов хранятся в кеше Django:
+# LocMemCache у каждого процесса свой, и сброс в одном воркере не дошел бы
+# до остальных.
+if workers > 1 and 'locmem' in os.getenv('CACHE_BACKEND', 'locmem').lower():
+    raise RuntimeError(
+        'Для GUNICORN_WORKERS > 1 нужен общий кеш: задайте CACHE_BACKEND '
+        'и CACHE_LOCATION, например memcached.')
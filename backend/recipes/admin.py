@@ -1,7 +1,23 @@
 from django.contrib import admin
 
-from .models import (FavoriteRecipe, Recipe, Ingredient, ShoppingCart,
-                     RecipeIngredient, Tag, Subscribe)
+from .search import update_search_vector
+from .services import get_recipe_amounts, update_shopping_lists
+from .models import (CartItem, Favorite, ImageJob, Recipe, Ingredient,
+                     ShoppingListItem, RecipeIngredient, Tag, Subscribe)
+
+
+class ReadOnlyAdminMixin:
+    # Строки меняются только через API: вместе с ними обновляются счетчики
+    # рецептов и списки покупок.
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 class RecipeIngredientAdmin(admin.StackedInline):
@@ -14,7 +30,8 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = (
         'id', 'get_author', 'name', 'text',
         'cooking_time', 'get_tags', 'get_ingredients',
-        'pub_date', 'get_favorite_count')
+        'pub_date', 'get_favorite_count', 'in_carts_count',
+        'image_status')
     search_fields = (
         'name', 'cooking_time',
         'author__email', 'ingredients__name')
@@ -22,6 +39,14 @@ class RecipeAdmin(admin.ModelAdmin):
     inlines = (RecipeIngredientAdmin,)
     empty_value_display = '-пусто-'
 
+    def save_related(self, request, form, formsets, change):
+        old_amounts = get_recipe_amounts(form.instance)
+        super().save_related(request, form, formsets, change)
+        update_shopping_lists(
+            form.instance, old_amounts, get_recipe_amounts(form.instance))
+        update_search_vector(
+            Recipe.objects.filter(id=form.instance.id))
+
     @admin.display(description='Электронная почта')
     def get_author(self, obj):
         return obj.author.email
@@ -40,9 +65,11 @@ class RecipeAdmin(admin.ModelAdmin):
                 'ingredient__name',
                 'amount', 'ingredient__measurement_unit')])
 
-    @admin.display(description='В избранном')
+    @admin.display(
+        description='В избранном',
+        ordering='favorites_count')
     def get_favorite_count(self, obj):
-        return obj.favorite_recipe.count()
+        return obj.favorites_count
 
 
 @admin.register(Ingredient)
@@ -71,33 +98,40 @@ class SubscribeAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-@admin.register(FavoriteRecipe)
-class FavoriteRecipeAdmin(admin.ModelAdmin):
+@admin.register(Favorite)
+class FavoriteAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
     list_display = (
-        'id', 'user', 'get_recipe', 'get_count')
+        'id', 'user', 'recipe', 'created',)
+    search_fields = (
+        'user__email', 'recipe__name',)
+    list_select_related = ('user', 'recipe',)
     empty_value_display = '-пусто-'
 
-    @admin.display(description='Рецепты')
-    def get_recipe(self, obj):
-        return [
-            f'{item["name"]} ' for item in obj.recipe.values('name')[:5]]
 
-    @admin.display(description='В избранном')
-    def get_count(self, obj):
-        return obj.recipe.count()
+@admin.register(CartItem)
+class CartItemAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = (
+        'id', 'user', 'recipe', 'created',)
+    search_fields = (
+        'user__email', 'recipe__name',)
+    list_select_related = ('user', 'recipe',)
+    empty_value_display = '-пусто-'
 
 
-@admin.register(ShoppingCart)
-class SoppingCartAdmin(admin.ModelAdmin):
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
     list_display = (
-        'id', 'user', 'get_recipe', 'get_count')
+        'id', 'user', 'ingredient', 'amount',)
+    search_fields = ('user__email', 'ingredient__name',)
     empty_value_display = '-пусто-'
 
-    @admin.display(description='Рецепты')
-    def get_recipe(self, obj):
-        return [
-            f'{item["name"]} ' for item in obj.recipe.values('name')[:5]]
 
-    @admin.display(description='В избранном')
-    def get_count(self, obj):
-        return obj.recipe.count()
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'recipe', 'status', 'attempts', 'error', 'updated',)
+    list_filter = ('status',)
+    search_fields = ('recipe__name',)
+    exclude = ('payload',)
+    list_select_related = ('recipe',)
+    empty_value_display = '-пусто-'
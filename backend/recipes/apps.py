@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .indexes import create_postgres_indexes
+        from .search import create_search_index, register_sqlite_functions
+
+        post_migrate.connect(create_search_index, sender=self)
+        post_migrate.connect(create_postgres_indexes, sender=self)
+        connection_created.connect(register_sqlite_functions)
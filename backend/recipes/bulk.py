@@ -0,0 +1,293 @@
+import base64
+import itertools
+import json
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator
+from django.db import DatabaseError, connection, models, transaction
+from django.db.backends.base.operations import BaseDatabaseOperations
+from django.db.models import Prefetch
+
+from .images import ImageError, delete_original, save_original
+from .jobs import enqueue_variants
+from .models import Ingredient, Recipe, RecipeIngredient, Tag
+from .search import update_search_vector
+from .versions import bump_model
+
+User = get_user_model()
+
+CHUNK_SIZE = 500
+WORKERS = 4
+
+
+class RowError(Exception):
+    pass
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(itertools.islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, size))
+
+
+def encode_image(image):
+    if not image:
+        return None
+    try:
+        with image.open('rb') as file:
+            data = file.read()
+    except (FileNotFoundError, ValueError):
+        return None
+    content_type = mimetypes.guess_type(image.name)[0] or 'image/png'
+    return (
+        f'data:{content_type};base64,'
+        f'{base64.b64encode(data).decode()}')
+
+
+def export_recipe(recipe):
+    return json.dumps({
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'author': recipe.author.email,
+        'tags': [tag.slug for tag in recipe.tags.all()],
+        'ingredients': [
+            {
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            } for item in recipe.recipe.all()],
+        'image': encode_image(recipe.image),
+    }, ensure_ascii=False)
+
+
+def export_recipes(queryset, chunk_size=CHUNK_SIZE):
+    queryset = queryset.select_related('author').prefetch_related(
+        'tags',
+        Prefetch(
+            'recipe',
+            queryset=RecipeIngredient.objects.select_related('ingredient'))
+    ).order_by('-id')
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(
+            id__lt=last_id)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        for recipe in chunk:
+            yield f'{export_recipe(recipe)}\n'
+        last_id = chunk[-1].id
+
+
+def save_image(data):
+    if not data:
+        return None
+    try:
+        return save_original(data)
+    except ImageError as error:
+        raise RowError(str(error))
+
+
+def get_validators(field):
+    # SQLite не сообщает диапазоны целых полей, поэтому верхняя граница
+    # берется из общих для всех БД диапазонов Django.
+    field_validators = list(field.validators)
+    if isinstance(field, models.IntegerField):
+        _, maximum = BaseDatabaseOperations.integer_field_ranges[
+            field.get_internal_type()]
+        field_validators.append(MaxValueValidator(maximum))
+    return field_validators
+
+
+def validate_field(model, name, value):
+    for validator in get_validators(model._meta.get_field(name)):
+        try:
+            validator(value)
+        except ValidationError as error:
+            raise RowError(f'Поле {name}: {" ".join(error.messages)}')
+
+
+def check_limits(row):
+    validate_field(Recipe, 'name', row['name'])
+    validate_field(Recipe, 'cooking_time', row['cooking_time'])
+    for amount in row['ingredients'].values():
+        validate_field(RecipeIngredient, 'amount', amount)
+
+
+def check_row(row):
+    for field in ('name', 'text', 'cooking_time', 'tags', 'ingredients'):
+        if not row.get(field):
+            raise RowError(f'Не заполнено поле {field}.')
+    for field in ('name', 'text', 'author'):
+        if not isinstance(row.get(field) or '', str):
+            raise RowError(f'Поле {field} должно быть строкой.')
+    if not isinstance(row['tags'], list):
+        raise RowError('Тэги должны быть списком слагов.')
+    try:
+        row['cooking_time'] = int(row['cooking_time'])
+        row['ingredients'] = {
+            (item['name'], item['measurement_unit']): int(item['amount'])
+            for item in row['ingredients']}
+    except (KeyError, TypeError, ValueError):
+        raise RowError(
+            'Некорректные ингредиенты или время приготовления.')
+    if row['cooking_time'] < 1:
+        raise RowError('Время приготовления должно быть больше или равно 1.')
+    if min(row['ingredients'].values()) < 1:
+        raise RowError(
+            'Количество ингредиента должно быть больше или равно 1')
+    check_limits(row)
+    row['tags'] = [str(slug) for slug in row['tags']]
+    return row
+
+
+def parse_row(line):
+    try:
+        row = json.loads(line)
+    except ValueError:
+        raise RowError('Некорректный JSON.')
+    if not isinstance(row, dict):
+        raise RowError('Строка должна содержать объект рецепта.')
+    return check_row(row)
+
+
+def resolve_rows(rows, default_author):
+    tags = {
+        tag.slug: tag for tag in Tag.objects.filter(
+            slug__in={slug for _, row in rows for slug in row['tags']})}
+    ingredients = {
+        (ingredient.name, ingredient.measurement_unit): ingredient.id
+        for ingredient in Ingredient.objects.filter(
+            name__in={
+                name for _, row in rows for name, _ in row['ingredients']})}
+    authors = {
+        user.email: user for user in User.objects.filter(
+            email__in={row['author'] for _, row in rows
+                       if row.get('author')})}
+    resolved, errors = [], []
+    for line_number, row in rows:
+        author = authors.get(row.get('author')) or default_author
+        missing = (
+            [slug for slug in row['tags'] if slug not in tags]
+            + [name for name, unit in row['ingredients']
+               if (name, unit) not in ingredients])
+        if author is None:
+            errors.append((line_number, 'Автор рецепта не найден.'))
+        elif missing:
+            errors.append((line_number, f'Не найдены: {missing}.'))
+        else:
+            row['author'] = author
+            row['tags'] = [tags[slug] for slug in row['tags']]
+            row['ingredients'] = {
+                ingredients[key]: amount
+                for key, amount in row['ingredients'].items()}
+            resolved.append((line_number, row))
+    return resolved, errors
+
+
+def save_recipes(rows):
+    recipes = [
+        Recipe(
+            author=row['author'],
+            name=row['name'],
+            text=row['text'],
+            cooking_time=row['cooking_time'],
+            image=row['image'])
+        for _, row in rows]
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+        else:
+            for recipe in recipes:
+                recipe.save()
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient_id,
+                amount=amount)
+            for recipe, (_, row) in zip(recipes, rows)
+            for ingredient_id, amount in row['ingredients'].items())
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tag)
+            for recipe, (_, row) in zip(recipes, rows)
+            for tag in row['tags'])
+        update_search_vector(
+            Recipe.objects.filter(id__in=[recipe.id for recipe in recipes]))
+        transaction.on_commit(lambda: bump_model('recipe'))
+        enqueue_variants(recipe for recipe in recipes if recipe.image)
+    return recipes
+
+
+def save_row(line_number, row):
+    try:
+        save_recipes([(line_number, row)])
+    except DatabaseError as error:
+        # Файл изображения записан до вставки, без рецепта он не нужен.
+        delete_original(row['image'])
+        return f'Ошибка записи: {error}'
+    return None
+
+
+def save_rows(rows):
+    if not rows:
+        return 0, []
+    if len(rows) > 1:
+        try:
+            return len(save_recipes(rows)), []
+        except DatabaseError:
+            pass
+    # Пачка откатилась целиком: строки сохраняются по одной, чтобы ошибка
+    # одной строки не отменяла остальные.
+    errors = []
+    for line_number, row in rows:
+        error = save_row(line_number, row)
+        if error:
+            errors.append((line_number, error))
+    return len(rows) - len(errors), errors
+
+
+def import_chunk(lines, default_author, pool):
+    rows, errors = [], []
+    for line_number, line in lines:
+        try:
+            rows.append((line_number, parse_row(line)))
+        except RowError as error:
+            errors.append((line_number, str(error)))
+    rows, resolve_errors = resolve_rows(rows, default_author)
+    errors.extend(resolve_errors)
+    images = [pool.submit(save_image, row.get('image')) for _, row in rows]
+    valid = []
+    for (line_number, row), future in zip(rows, images):
+        try:
+            row['image'] = future.result()
+        except RowError as error:
+            errors.append((line_number, str(error)))
+        else:
+            valid.append((line_number, row))
+    created, save_errors = save_rows(valid)
+    errors.extend(save_errors)
+    return created, errors
+
+
+def import_recipes(lines, default_author=None,
+                   chunk_size=CHUNK_SIZE, workers=WORKERS):
+    lines = (
+        (line_number, line)
+        for line_number, line in enumerate(lines, start=1)
+        if line.strip())
+    created, errors = 0, []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for chunk in chunked(lines, chunk_size):
+            chunk_created, chunk_errors = import_chunk(
+                chunk, default_author, pool)
+            created += chunk_created
+            errors.extend(chunk_errors)
+    return created, [
+        {'line': line_number, 'error': error}
+        for line_number, error in sorted(errors)]
@@ -0,0 +1,153 @@
+import base64
+import binascii
+import hashlib
+import io
+import posixpath
+import uuid
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import Recipe
+from .versions import bump_recipes
+
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+# Оригинал перекодируется: JPEG и WebP сохраняют формат, остальное - PNG.
+ORIGINAL_FORMATS = {
+    'JPEG': ('JPEG', 'jpg', {'quality': 90}),
+    'WEBP': ('WEBP', 'webp', {'quality': 90}),
+}
+PNG_FORMAT = ('PNG', 'png', {'optimize': True})
+PNG_MODES = ('1', 'L', 'LA', 'P', 'RGB', 'RGBA')
+VARIANTS_DIR = 'recipe/variants'
+IMAGE_FIELD = Recipe._meta.get_field('image')
+STORAGE = IMAGE_FIELD.storage
+
+
+class ImageError(Exception):
+    pass
+
+
+def decode_image(content):
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            source_format = image.format
+            image = ImageOps.exif_transpose(image)
+    except Image.DecompressionBombError:
+        raise ImageError('Слишком большое изображение.')
+    except (OSError, SyntaxError, ValueError):
+        raise ImageError('Некорректное изображение.')
+    icc_profile = image.info.get('icc_profile')
+    # Без EXIF (в том числе координат), XMP и комментариев исходника.
+    image.info = {}
+    return image, source_format, icc_profile
+
+
+def open_image(content):
+    image, _, _ = decode_image(content)
+    return image.convert('RGB')
+
+
+def save_original(data):
+    if not isinstance(data, str):
+        raise ImageError('Некорректное изображение.')
+    if ';base64,' in data:
+        data = data.split(';base64,', 1)[1]
+    try:
+        content = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        raise ImageError('Некорректное изображение.')
+    image, source_format, icc_profile = decode_image(content)
+    image_format, extension, options = ORIGINAL_FORMATS.get(
+        source_format, PNG_FORMAT)
+    if image_format == 'PNG' and image.mode not in PNG_MODES:
+        image = image.convert('RGBA' if 'A' in image.mode else 'RGB')
+    if icc_profile:
+        options = {**options, 'icc_profile': icc_profile}
+    name = IMAGE_FIELD.generate_filename(
+        None, f'{uuid.uuid4()}.{extension}')
+    return STORAGE.save(
+        name, ContentFile(encode(image, image_format, options)))
+
+
+def delete_original(name):
+    if name:
+        STORAGE.delete(name)
+
+
+def encode(image, image_format, options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def render_variants(content, prefix):
+    image = open_image(content)
+    widths = sorted(
+        {min(width, image.width) for width in settings.IMAGE_VARIANT_SIZES})
+    variants = []
+    for width in widths:
+        resized = image if width == image.width else image.resize(
+            (width, round(image.height * width / image.width)),
+            Image.LANCZOS)
+        variant = {'width': width, 'height': resized.height}
+        for extension, image_format, options in FORMATS:
+            variant[extension] = STORAGE.save(
+                posixpath.join(prefix, f'{width}.{extension}'),
+                ContentFile(encode(resized, image_format, options)))
+        variants.append(variant)
+    return variants
+
+
+def delete_variants(variants):
+    for variant in variants.get('items', ()):
+        for extension, _, _ in FORMATS:
+            STORAGE.delete(variant[extension])
+
+
+def build_variants(recipe_id):
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is None or not recipe.image:
+        return None
+    source = recipe.image.name
+    with recipe.image.open('rb') as file:
+        content = file.read()
+    prefix = posixpath.join(
+        VARIANTS_DIR, str(recipe.id),
+        hashlib.sha1(source.encode()).hexdigest()[:12])
+    variants = {'source': source, 'items': render_variants(content, prefix)}
+    updated = Recipe.objects.filter(
+        id=recipe.id, image=source
+    ).update(image_variants=variants)
+    if not updated:
+        delete_variants(variants)
+        return None
+    delete_variants(recipe.image_variants)
+    bump_recipes([recipe.id])
+    return variants
+
+
+def needs_variants(recipe):
+    return bool(recipe.image) and (
+        recipe.image_variants.get('source') != recipe.image.name)
+
+
+def get_image_variants(variants, build_url):
+    items = [
+        {
+            'width': variant['width'],
+            'height': variant['height'],
+            **{extension: build_url(STORAGE.url(variant[extension]))
+               for extension, _, _ in FORMATS},
+        } for variant in variants.get('items', ())]
+    return {
+        'items': items,
+        'srcset': {
+            extension: ', '.join(
+                f'{item[extension]} {item["width"]}w' for item in items)
+            for extension, _, _ in FORMATS},
+    }
@@ -0,0 +1,22 @@
+from django.db import connections
+
+from .models import Ingredient, Recipe
+
+# Индексы, которые нельзя описать в Meta моделей: выражение с классом
+# операторов и автоматически созданная таблица тегов рецептов.
+POSTGRES_INDEXES = {
+    'recipes_ingredient_name_upper_like': (
+        f'{Ingredient._meta.db_table} '
+        '(UPPER(name::text) text_pattern_ops)'),
+    'recipes_recipe_tags_tag_recipe': (
+        f'{Recipe.tags.through._meta.db_table} (tag_id, recipe_id)'),
+}
+
+
+def create_postgres_indexes(sender, using, **kwargs):
+    if connections[using].vendor != 'postgresql':
+        return
+    with connections[using].cursor() as cursor:
+        for name, definition in POSTGRES_INDEXES.items():
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
@@ -0,0 +1,48 @@
+import bisect
+
+from django.conf import settings
+
+from .models import Ingredient
+from .versions import get_version
+
+
+class IngredientIndex:
+
+    def __init__(self):
+        self.data = None, [], []
+
+    def load(self, version):
+        rows = sorted(
+            (name.casefold(), id, name, measurement_unit)
+            for id, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'))
+        self.data = version, [row[0] for row in rows], [
+            {'id': id, 'name': name, 'measurement_unit': measurement_unit}
+            for _, id, name, measurement_unit in rows]
+        return self.data
+
+    def get_data(self):
+        version = get_version('ingredients')
+        if self.data[0] != version:
+            return self.load(version)
+        return self.data
+
+    def search(self, query, limit=None):
+        limit = limit or settings.INGREDIENT_SEARCH_LIMIT
+        query = query.casefold()
+        _, keys, items = self.get_data()
+        result = []
+        index = bisect.bisect_left(keys, query)
+        while (index < len(keys) and len(result) < limit
+               and keys[index].startswith(query)):
+            result.append(items[index])
+            index += 1
+        for key, item in zip(keys, items):
+            if len(result) >= limit:
+                break
+            if query in key and not key.startswith(query):
+                result.append(item)
+        return result
+
+
+ingredient_index = IngredientIndex()
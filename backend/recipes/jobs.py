@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .images import ImageError, build_variants, save_original
+from .models import ImageJob, ImageStatus, Recipe
+from .versions import bump_recipes
+
+RETRY_DELAY = 10
+
+
+def set_image_status(recipe_id, image_status):
+    Recipe.objects.filter(id=recipe_id).update(image_status=image_status)
+    transaction.on_commit(lambda: bump_recipes([recipe_id]))
+
+
+def enqueue_image(recipe, data):
+    ImageJob.objects.filter(
+        recipe=recipe, status=ImageJob.Status.PENDING
+    ).update(status=ImageJob.Status.CANCELLED)
+    ImageJob.objects.create(recipe=recipe, payload=data)
+    recipe.image_status = ImageStatus.PROCESSING
+    set_image_status(recipe.id, ImageStatus.PROCESSING)
+
+
+def enqueue_variants(recipes):
+    ImageJob.objects.bulk_create(
+        ImageJob(recipe=recipe) for recipe in recipes)
+
+
+def claim_job():
+    now = timezone.now()
+    jobs = ImageJob.objects.select_for_update(skip_locked=True).filter(
+        status__in=(ImageJob.Status.PENDING, ImageJob.Status.PROCESSING),
+        run_after__lte=now)
+    with transaction.atomic():
+        # Задача, на которой воркер падает (например, по памяти), зависает
+        # в processing: после последней попытки она завершается ошибкой.
+        for job in jobs.filter(
+                attempts__gte=settings.IMAGE_JOB_MAX_ATTEMPTS):
+            fail_job(job, 'Превышено время обработки.')
+        # Остальные зависшие в processing задачи снова доступны.
+        job = jobs.filter(
+            attempts__lt=settings.IMAGE_JOB_MAX_ATTEMPTS
+        ).order_by('run_after', 'id').first()
+        if job is None:
+            return None
+        job.status = ImageJob.Status.PROCESSING
+        job.attempts += 1
+        job.run_after = now + timedelta(seconds=settings.IMAGE_JOB_TIMEOUT)
+        job.save(update_fields=('status', 'attempts', 'run_after', 'updated'))
+    return job
+
+
+def run_job(job):
+    if job.payload:
+        if ImageJob.objects.filter(
+                recipe_id=job.recipe_id, id__gt=job.id
+        ).exclude(payload='').exists():
+            return ImageJob.Status.CANCELLED
+        Recipe.objects.filter(id=job.recipe_id).update(
+            image=save_original(job.payload),
+            image_status=ImageStatus.READY)
+        job.payload = ''
+        job.save(update_fields=('payload', 'updated'))
+    build_variants(job.recipe_id)
+    return ImageJob.Status.DONE
+
+
+def fail_job(job, error):
+    job.status = ImageJob.Status.FAILED
+    job.error = error
+    job.save(update_fields=('status', 'error', 'updated'))
+    if job.payload:
+        set_image_status(job.recipe_id, ImageStatus.FAILED)
+
+
+def retry_job(job, error):
+    if job.attempts >= settings.IMAGE_JOB_MAX_ATTEMPTS:
+        fail_job(job, error)
+        return
+    job.status = ImageJob.Status.PENDING
+    job.error = error
+    job.run_after = timezone.now() + timedelta(
+        seconds=RETRY_DELAY * 2 ** job.attempts)
+    job.save(update_fields=('status', 'error', 'run_after', 'updated'))
+
+
+def process_job(job):
+    try:
+        job.status = run_job(job)
+    except ImageError as error:
+        fail_job(job, str(error))
+    except Exception as error:
+        retry_job(job, repr(error))
+    else:
+        job.save(update_fields=('status', 'updated'))
@@ -0,0 +1,54 @@
+import itertools
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from recipes.models import (CartItem, Favorite, FavoriteRecipe,
+                            ShoppingCart)
+from recipes.services import rebuild_shopping_list
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит избранное и корзины из устаревших контейнеров '
+        'FavoriteRecipe и ShoppingCart в таблицы Favorite и CartItem.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE)
+
+    def copy(self, legacy, model, batch_size):
+        through = legacy.recipe.through
+        container = legacy._meta.model_name
+        rows = through.objects.filter(
+            **{f'{container}__user__isnull': False}
+        ).order_by('id').values_list(
+            f'{container}__user_id', 'recipe_id').iterator(
+            chunk_size=batch_size)
+        users, total = set(), 0
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            model.objects.bulk_create(
+                (model(user_id=user_id, recipe_id=recipe_id)
+                 for user_id, recipe_id in batch),
+                ignore_conflicts=True)
+            users.update(user_id for user_id, _ in batch)
+            total += len(batch)
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: обработано {total}.')
+        return users
+
+    def handle(self, *args, **options):
+        self.copy(FavoriteRecipe, Favorite, options['batch_size'])
+        users = self.copy(ShoppingCart, CartItem, options['batch_size'])
+        for user in User.objects.filter(id__in=users).iterator():
+            rebuild_shopping_list(user)
+        call_command('reconcile_recipe_counters', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Перенос завершен.'))
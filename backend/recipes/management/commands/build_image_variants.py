@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import build_variants, needs_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные WebP/JPEG копии изображений рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересобрать варианты для всех рецептов.')
+
+    def handle(self, *args, **options):
+        built = 0
+        recipes = Recipe.objects.only('id', 'image', 'image_variants')
+        for recipe in recipes.iterator():
+            if needs_variants(recipe) or options['force'] and recipe.image:
+                built += build_variants(recipe.id) is not None
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {built}.'))
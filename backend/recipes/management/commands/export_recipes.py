@@ -0,0 +1,26 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from recipes.bulk import CHUNK_SIZE, export_recipes
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Экспортирует рецепты в файл NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Путь к файлу NDJSON или - для стандартного вывода.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        file = (
+            sys.stdout if options['path'] == '-'
+            else open(options['path'], 'w', encoding='utf-8'))
+        with file:
+            for line in export_recipes(
+                    Recipe.objects.all(), options['chunk_size']):
+                file.write(line)
@@ -0,0 +1,45 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.bulk import CHUNK_SIZE, WORKERS, import_recipes
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Импортирует рецепты из файла NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Путь к файлу NDJSON или - для стандартного ввода.')
+        parser.add_argument(
+            '--author',
+            help='Email автора для рецептов без поля author.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            '--workers', type=int, default=WORKERS)
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            author = User.objects.filter(email=options['author']).first()
+            if author is None:
+                raise CommandError(
+                    f'Пользователь {options["author"]} не найден.')
+        file = (
+            sys.stdin if options['path'] == '-'
+            else open(options['path'], encoding='utf-8'))
+        with file:
+            created, errors = import_recipes(
+                file,
+                default_author=author,
+                chunk_size=options['chunk_size'],
+                workers=options['workers'])
+        for error in errors:
+            self.stderr.write(f'Строка {error["line"]}: {error["error"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано рецептов: {created}, ошибок: {len(errors)}.'))
@@ -0,0 +1,85 @@
+import csv
+import itertools
+import json
+import os
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.versions import bump_model
+from recipes.models import Ingredient
+
+BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE)
+    position = SEPARATORS.match(buffer).end()
+    if buffer[position:position + 1] != '[':
+        raise CommandError('Ожидается JSON-массив ингредиентов.')
+    position += 1
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer[position:position + 1] == ']':
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except ValueError:
+            chunk = file.read(READ_SIZE)
+            if not chunk:
+                raise CommandError('Некорректный JSON-файл.')
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item['name'], item['measurement_unit']
+
+
+def unique(rows):
+    seen = set()
+    for name, measurement_unit in rows:
+        row = name.strip(), measurement_unit.strip()
+        if row[0] and row not in seen:
+            seen.add(row)
+            yield row
+
+
+class Command(BaseCommand):
+    help = 'Загружает ингредиенты из файла CSV или JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=os.path.join(settings.BASE_DIR, 'data', 'ingredients.csv'))
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        read = read_json if path.endswith('.json') else read_csv
+        before = Ingredient.objects.count()
+        processed = 0
+        with open(path, encoding='utf-8') as file:
+            rows = unique(read(file))
+            while True:
+                batch = list(itertools.islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                processed += len(batch)
+                Ingredient.objects.bulk_create(
+                    (Ingredient(name=name, measurement_unit=measurement_unit)
+                     for name, measurement_unit in batch),
+                    ignore_conflicts=True)
+        bump_model('ingredient')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано ингредиентов: {processed}, добавлено: '
+            f'{Ingredient.objects.count() - before}.'))
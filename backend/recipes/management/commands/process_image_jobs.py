@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipes.jobs import claim_job, process_job
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь загруженных изображений рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Завершиться, когда очередь опустеет.')
+        parser.add_argument(
+            '--sleep', type=float, default=2,
+            help='Пауза в секундах при пустой очереди.')
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            close_old_connections()
+            job = claim_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            process_job(job)
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано задач: {processed}.'))
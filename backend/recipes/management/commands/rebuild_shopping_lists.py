@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from recipes.services import check_shopping_list, rebuild_shopping_list
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Проверяет и пересобирает списки покупок пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить списки, не исправляя их.')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            Q(cart_items__isnull=False)
+            | Q(shopping_list__isnull=False)).distinct()
+        checked = broken = 0
+        for user in users.iterator():
+            checked += 1
+            if check_shopping_list(user):
+                continue
+            broken += 1
+            if options['check']:
+                self.stdout.write(f'Расхождение у пользователя {user}.')
+            else:
+                rebuild_shopping_list(user)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено списков: {checked}, '
+            f'с расхождениями: {broken}.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from recipes.models import Recipe
+from recipes.services import reconcile_counters
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики избранного и корзин у рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = Recipe.objects.aggregate(Max('id'))['id__max'] or 0
+        fixed = 0
+        for start in range(0, last_id, batch_size):
+            fixed += reconcile_counters(Recipe.objects.filter(
+                id__gt=start, id__lte=start + batch_size))
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счетчиков у рецептов: {fixed}.'))
@@ -1,7 +1,7 @@
 from django.db import models
 from django.core import validators
-from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.utils import timezone
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -22,6 +22,10 @@ class Ingredient(models.Model):
         ordering = ['id']
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient_unit')]
 
     def __str__(self):
         return f'{self.name}'
@@ -49,6 +53,12 @@ class Tag(models.Model):
         return self.name
 
 
+class ImageStatus(models.TextChoices):
+    READY = 'ready', 'Готово'
+    PROCESSING = 'processing', 'Обрабатывается'
+    FAILED = 'failed', 'Ошибка'
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -81,11 +91,47 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True)
+    image_status = models.CharField(
+        'Состояние изображения',
+        max_length=20,
+        choices=ImageStatus.choices,
+        default=ImageStatus.READY,
+        editable=False)
+    image_variants = models.JSONField(
+        'Варианты изображения',
+        default=dict,
+        blank=True,
+        editable=False)
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False)
+    favorites_count = models.PositiveIntegerField(
+        'В избранном',
+        default=0,
+        editable=False)
+    in_carts_count = models.PositiveIntegerField(
+        'В корзинах',
+        default=0,
+        editable=False)
 
     class Meta:
         ordering = ['-id']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['author', '-id'],
+                name='recipe_author_id_idx'),
+            models.Index(
+                fields=['-favorites_count', '-in_carts_count', '-id'],
+                name='recipe_popular_idx'),
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_idx')]
+
+    def __str__(self):
+        return self.name
 
 
 class RecipeIngredient(models.Model):
@@ -112,6 +158,10 @@ class RecipeIngredient(models.Model):
             models.UniqueConstraint(
                 fields=['recipe', 'ingredient'],
                 name='unique_ingredient')]
+        indexes = [
+            models.Index(
+                fields=['ingredient', 'recipe'],
+                name='recipe_ingredient_reverse_idx')]
 
 
 class Subscribe(models.Model):
@@ -127,7 +177,7 @@ class Subscribe(models.Model):
         verbose_name='Автор')
     created = models.DateTimeField(
         'Дата подписки',
-        auto_now_add=True)
+        default=timezone.now)
 
     class Meta:
         ordering = ['-id']
@@ -137,11 +187,18 @@ class Subscribe(models.Model):
             models.UniqueConstraint(
                 fields=['user', 'author'],
                 name='unique_subscription')]
+        indexes = [
+            models.Index(
+                fields=['user', '-created'],
+                name='subscribe_user_created_idx')]
 
     def __str__(self):
         return f'Пользователь {self.user} -- автор {self.author}'
 
 
+# Устаревшие контейнеры избранного и корзины. Данные переносятся в Favorite
+# и CartItem командой backfill_favorites_and_carts, после переноса модели
+# будут удалены.
 class FavoriteRecipe(models.Model):
     user = models.OneToOneField(
         User,
@@ -162,12 +219,6 @@ class FavoriteRecipe(models.Model):
         list_ = [item['name'] for item in self.recipe.values('name')]
         return f'Пользователь {self.user} добавил {list_} в избранные.'
 
-    @receiver(post_save, sender=User)
-    def create_favorite_recipe(
-            sender, instance, created, **kwargs):
-        if created:
-            return FavoriteRecipe.objects.create(user=instance)
-
 
 class ShoppingCart(models.Model):
     user = models.OneToOneField(
@@ -190,8 +241,144 @@ class ShoppingCart(models.Model):
         list_ = [item['name'] for item in self.recipe.values('name')]
         return f'Пользователь {self.user} добавил {list_} в покупки.'
 
-    @receiver(post_save, sender=User)
-    def create_shopping_cart(
-            sender, instance, created, **kwargs):
-        if created:
-            return ShoppingCart.objects.create(user=instance)
+
+class Favorite(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='favorites',
+        verbose_name='Пользователь')
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='favorites',
+        verbose_name='Рецепт')
+    created = models.DateTimeField(
+        'Дата добавления',
+        auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = 'Избранный рецепт'
+        verbose_name_plural = 'Избранные рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_favorite')]
+        indexes = [
+            models.Index(
+                fields=['user', '-created'],
+                name='favorite_user_created_idx')]
+
+    def __str__(self):
+        return f'Пользователь {self.user} добавил {self.recipe} в избранные.'
+
+
+class CartItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='cart_items',
+        verbose_name='Пользователь')
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='cart_items',
+        verbose_name='Рецепт')
+    created = models.DateTimeField(
+        'Дата добавления',
+        auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = 'Покупка'
+        verbose_name_plural = 'Покупки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_cart_item')]
+        indexes = [
+            models.Index(
+                fields=['user', '-created'],
+                name='cart_item_user_created_idx')]
+
+    def __str__(self):
+        return f'Пользователь {self.user} добавил {self.recipe} в покупки.'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь')
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Ингредиент')
+    amount = models.IntegerField(
+        default=0,
+        verbose_name='Количество')
+
+    class Meta:
+        ordering = ['ingredient__name']
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Список покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item')]
+
+    def __str__(self):
+        return f'{self.ingredient} - {self.amount}'
+
+
+class ImageJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        PROCESSING = 'processing', 'Выполняется'
+        DONE = 'done', 'Выполнено'
+        FAILED = 'failed', 'Ошибка'
+        CANCELLED = 'cancelled', 'Отменено'
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Рецепт')
+    payload = models.TextField(
+        'Загруженное изображение',
+        blank=True)
+    status = models.CharField(
+        'Состояние',
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(
+        'Попытки',
+        default=0)
+    error = models.TextField(
+        'Ошибка',
+        blank=True)
+    run_after = models.DateTimeField(
+        'Выполнить после',
+        default=timezone.now)
+    created = models.DateTimeField(
+        'Дата создания',
+        auto_now_add=True)
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Обработка изображения'
+        verbose_name_plural = 'Обработка изображений'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_after'],
+                name='image_job_queue_idx')]
+
+    def __str__(self):
+        return f'{self.recipe} - {self.get_status_display()}'
@@ -0,0 +1,79 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.contrib.postgres.aggregates import StringAgg
+from django.db import connection, connections
+from django.db.models import CharField, F, Func, OuterRef, Q, Subquery
+
+from .models import Recipe, RecipeIngredient
+
+SEARCH_CONFIG = 'russian'
+SEARCH_INDEX = 'recipes_recipe_search_vector_gin'
+
+
+class UnicodeLower(Func):
+    function = 'UNICODE_LOWER'
+    output_field = CharField()
+
+
+def unicode_lower(value):
+    return None if value is None else value.lower()
+
+
+def register_sqlite_functions(sender, connection, **kwargs):
+    # Встроенные LOWER и LIKE в SQLite не различают регистр только латиницы.
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            UnicodeLower.function, 1, unicode_lower, deterministic=True)
+
+
+def is_postgresql():
+    return connection.vendor == 'postgresql'
+
+
+def update_search_vector(queryset):
+    if not is_postgresql():
+        return
+    ingredient_names = RecipeIngredient.objects.filter(
+        recipe=OuterRef('pk')
+    ).order_by().values('recipe').annotate(
+        names=StringAgg('ingredient__name', ' ')
+    ).values('names')
+    queryset.update(search_vector=(
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(
+            Subquery(ingredient_names),
+            weight='C',
+            config=SEARCH_CONFIG)))
+
+
+def search_recipes(queryset, value):
+    if not is_postgresql():
+        value = value.lower()
+        return queryset.alias(
+            search_name=UnicodeLower('name'),
+            search_text=UnicodeLower('text'),
+        ).filter(
+            Q(search_name__contains=value)
+            | Q(search_text__contains=value)
+            | Q(id__in=RecipeIngredient.objects.alias(
+                search_name=UnicodeLower('ingredient__name')
+            ).filter(
+                search_name__contains=value
+            ).values('recipe_id')))
+    query = SearchQuery(
+        value, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query)
+    ).order_by('-rank', '-id')
+
+
+def create_search_index(sender, using, **kwargs):
+    if connections[using].vendor != 'postgresql':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} '
+            f'ON {Recipe._meta.db_table} USING gin (search_vector)')
+    update_search_vector(
+        Recipe.objects.using(using).filter(search_vector__isnull=True))
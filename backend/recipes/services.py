@@ -0,0 +1,149 @@
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (Case, Count, F, IntegerField, OuterRef,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Coalesce
+
+from .models import (CartItem, Favorite, Recipe, RecipeIngredient,
+                     ShoppingListItem, Tag)
+from .versions import bump_recipes, get_version
+
+User = get_user_model()
+
+
+def get_recipe_amounts(recipe):
+    return dict(
+        RecipeIngredient.objects.filter(
+            recipe=recipe
+        ).values_list('ingredient_id', 'amount'))
+
+
+def apply_shopping_list_delta(user_ids, delta):
+    delta = {
+        ingredient_id: amount
+        for ingredient_id, amount in delta.items() if amount}
+    user_ids = list(user_ids)
+    if not delta or not user_ids:
+        return
+    # Недостающие строки создаются с нулем: параллельные запросы не
+    # падают на уникальности, а суммы меняет один атомарный UPDATE.
+    # Обнулившиеся строки не удаляются: иначе UPDATE параллельной
+    # транзакции, ждавший блокировки строки, не нашел бы ее и потерял
+    # свою прибавку. Пустые позиции отбрасываются при чтении.
+    with transaction.atomic():
+        ShoppingListItem.objects.bulk_create(
+            (ShoppingListItem(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                amount=0)
+             for user_id in user_ids
+             for ingredient_id, amount in delta.items() if amount > 0),
+            ignore_conflicts=True)
+        ShoppingListItem.objects.filter(
+            user_id__in=user_ids,
+            ingredient_id__in=delta
+        ).update(
+            amount=F('amount') + Case(
+                *(When(ingredient_id=ingredient_id, then=Value(amount))
+                  for ingredient_id, amount in delta.items()),
+                output_field=IntegerField()))
+
+
+def add_to_shopping_list(user, recipe):
+    apply_shopping_list_delta(
+        [user.id], get_recipe_amounts(recipe))
+
+
+def remove_from_shopping_list(user, recipe):
+    apply_shopping_list_delta(
+        [user.id],
+        {ingredient_id: -amount for ingredient_id, amount
+         in get_recipe_amounts(recipe).items()})
+
+
+def update_shopping_lists(recipe, old_amounts, new_amounts):
+    delta = Counter(new_amounts)
+    delta.subtract(old_amounts)
+    apply_shopping_list_delta(
+        CartItem.objects.filter(
+            recipe=recipe
+        ).values_list('user_id', flat=True),
+        delta)
+
+
+def get_shopping_list_totals(user):
+    return dict(
+        RecipeIngredient.objects.filter(
+            recipe__cart_items__user=user
+        ).values('ingredient_id').annotate(
+            total=Sum('amount')
+        ).order_by().values_list('ingredient_id', 'total'))
+
+
+def get_shopping_list(user):
+    return user.shopping_list.filter(amount__gt=0)
+
+
+def check_shopping_list(user):
+    return get_shopping_list_totals(user) == dict(
+        user.shopping_list.exclude(
+            amount=0
+        ).values_list('ingredient_id', 'amount'))
+
+
+@transaction.atomic
+def rebuild_shopping_list(user):
+    user.shopping_list.all().delete()
+    ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(
+            user=user,
+            ingredient_id=ingredient_id,
+            amount=amount)
+        for ingredient_id, amount in get_shopping_list_totals(user).items())
+
+
+def change_counter(recipe, field, delta):
+    # update() не шлет сигналы, версия рецепта сбрасывается здесь: счетчики
+    # и порядок popular видны в закешированных ответах.
+    Recipe.objects.filter(id=recipe.id).update(**{field: F(field) + delta})
+    transaction.on_commit(lambda: bump_recipes([recipe.id]))
+
+
+def count_subquery(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                recipe=OuterRef('pk')
+            ).order_by().values('recipe').annotate(
+                total=Count('id')
+            ).values('total')),
+        0)
+
+
+def reconcile_counters(queryset):
+    stale = list(queryset.alias(
+        actual_favorites=count_subquery(Favorite),
+        actual_carts=count_subquery(CartItem),
+    ).exclude(
+        favorites_count=F('actual_favorites'),
+        in_carts_count=F('actual_carts'),
+    ).values_list('id', flat=True))
+    if stale:
+        Recipe.objects.filter(id__in=stale).update(
+            favorites_count=count_subquery(Favorite),
+            in_carts_count=count_subquery(CartItem))
+        transaction.on_commit(lambda: bump_recipes(stale))
+    return len(stale)
+
+
+def get_tag_map(refresh=False):
+    key = f'tag_map:{get_version("tags")}'
+    tag_map = None if refresh else cache.get(key)
+    if tag_map is None:
+        tag_map = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(key, tag_map, settings.TAG_MAP_TIMEOUT)
+    return tag_map
@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from .images import delete_variants, needs_variants
+from .jobs import enqueue_variants
+from .models import CartItem, Ingredient, Recipe, RecipeIngredient, Tag
+from .search import update_search_vector
+from .services import apply_shopping_list_delta, get_recipe_amounts
+from .versions import bump, bump_model, bump_recipes
+
+User = get_user_model()
+
+# Поля автора, которые попадают во фрагменты его рецептов.
+AUTHOR_FIELDS = frozenset(
+    ('email', 'username', 'first_name', 'last_name'))
+
+
+def on_commit_bump_recipes(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    if recipe_ids:
+        transaction.on_commit(lambda: bump_recipes(recipe_ids))
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_recipe_from_shopping_lists(sender, instance, **kwargs):
+    apply_shopping_list_delta(
+        CartItem.objects.filter(
+            recipe=instance
+        ).values_list('user_id', flat=True),
+        {ingredient_id: -amount for ingredient_id, amount
+         in get_recipe_amounts(instance).items()})
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes(sender, instance, created, **kwargs):
+    if not created:
+        update_search_vector(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver(post_save, sender=Recipe)
+def build_image_variants(sender, instance, **kwargs):
+    if needs_variants(instance):
+        enqueue_variants([instance])
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_image_variants(sender, instance, **kwargs):
+    transaction.on_commit(lambda: delete_variants(instance.image_variants))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    on_commit_bump_recipes([instance.id])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_ingredients(sender, instance, **kwargs):
+    on_commit_bump_recipes([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        on_commit_bump_recipes([instance.id])
+    elif pk_set:
+        on_commit_bump_recipes(pk_set)
+    else:
+        # Очистка рецептов у тега: затронутые рецепты уже неизвестны.
+        transaction.on_commit(lambda: bump_model('tag'))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    transaction.on_commit(lambda: bump_model('tag'))
+
+
+@receiver(post_save, sender=Ingredient)
+def invalidate_ingredient(sender, instance, created, **kwargs):
+    transaction.on_commit(lambda: bump('ingredients'))
+    if not created:
+        on_commit_bump_recipes(
+            Recipe.objects.filter(
+                ingredients=instance
+            ).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    # Рецепты сбрасываются при каскадном удалении RecipeIngredient.
+    transaction.on_commit(lambda: bump('ingredients'))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, instance, created, update_fields=None,
+                              **kwargs):
+    if created or (
+            update_fields is not None
+            and not AUTHOR_FIELDS.intersection(update_fields)):
+        return
+    on_commit_bump_recipes(
+        Recipe.objects.filter(
+            author=instance
+        ).values_list('id', flat=True))
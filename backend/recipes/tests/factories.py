@@ -0,0 +1,27 @@
+from recipes.models import Recipe, RecipeIngredient
+from users.models import User
+
+
+def create_user(number):
+    return User.objects.create(
+        email=f'user{number}@example.com',
+        username=f'user{number}',
+        first_name='Имя',
+        last_name='Фамилия',
+        password='password')
+
+
+def create_recipes(authors, count, tags=(), ingredients=()):
+    recipes = []
+    for number in range(count):
+        recipe = Recipe.objects.create(
+            author=authors[number % len(authors)],
+            name=f'Рецепт {number}',
+            text='Описание',
+            cooking_time=10)
+        recipe.tags.set(tags)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients)
+        recipes.append(recipe)
+    return recipes
@@ -0,0 +1,15 @@
+import unittest
+
+from django.db import connection
+
+postgresql_only = unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    'Планы запросов проверяются только на Postgres.')
+
+
+def explain(queryset):
+    # На маленьких тестовых таблицах планировщик выбирает последовательное
+    # чтение, поэтому до конца тестовой транзакции оно запрещено.
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from recipes.models import CartItem, Favorite, Ingredient, Tag
+from recipes.services import rebuild_shopping_list
+from recipes.tests.factories import create_recipes, create_user
+
+
+class ReadOnlyAdminTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user(0)
+        cls.admin.is_staff = cls.admin.is_superuser = True
+        cls.admin.save()
+        recipe, = create_recipes([cls.admin], 1)
+        cls.rows = [
+            Favorite.objects.create(user=cls.admin, recipe=recipe),
+            CartItem.objects.create(user=cls.admin, recipe=recipe)]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_favorites_and_cart_items_are_read_only(self):
+        for row in self.rows:
+            prefix = f'admin:recipes_{row._meta.model_name}'
+            with self.subTest(model=row._meta.model_name):
+                self.assertEqual(self.client.get(
+                    reverse(f'{prefix}_changelist')).status_code, 200)
+                self.assertEqual(self.client.get(
+                    reverse(f'{prefix}_add')).status_code, 403)
+                self.assertEqual(self.client.post(
+                    reverse(f'{prefix}_delete', args=(row.id,)),
+                    {'post': 'yes'}).status_code, 403)
+                self.assertTrue(
+                    type(row).objects.filter(id=row.id).exists())
+
+
+class RecipeAdminTest(TestCase):
+
+    def test_ingredient_changes_update_shopping_lists(self):
+        admin = create_user(0)
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        recipe, = create_recipes([admin], 1, [tag], [salt])
+        item = recipe.recipe.get()
+        buyer = create_user(1)
+        CartItem.objects.create(user=buyer, recipe=recipe)
+        rebuild_shopping_list(buyer)
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse('admin:recipes_recipe_change', args=(recipe.id,)), {
+                'author': admin.id,
+                'name': recipe.name,
+                'text': recipe.text,
+                'cooking_time': recipe.cooking_time,
+                'tags': [tag.id],
+                'recipe-TOTAL_FORMS': 1,
+                'recipe-INITIAL_FORMS': 1,
+                'recipe-0-id': item.id,
+                'recipe-0-recipe': recipe.id,
+                'recipe-0-ingredient': salt.id,
+                'recipe-0-amount': 5,
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            dict(buyer.shopping_list.values_list('ingredient_id', 'amount')),
+            {salt.id: 5})
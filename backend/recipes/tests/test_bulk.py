@@ -0,0 +1,91 @@
+import json
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase
+from PIL import Image
+
+from recipes import bulk
+from recipes.bulk import import_recipes
+from recipes.images import STORAGE
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.tests.test_images import encode
+from users.models import User
+
+IMAGES_DIR = 'static/recipe'
+
+
+def list_images():
+    if not STORAGE.exists(IMAGES_DIR):
+        return set()
+    return set(STORAGE.listdir(IMAGES_DIR)[1])
+
+
+class ImportRecipesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            email='author@example.com', username='author',
+            first_name='Имя', last_name='Фамилия', password='password')
+        Tag.objects.create(name='Завтрак', color='#000000', slug='breakfast')
+        Ingredient.objects.create(name='Соль', measurement_unit='г')
+
+    def get_row(self, **fields):
+        return json.dumps({
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 5,
+            'tags': ['breakfast'],
+            'ingredients': [
+                {'name': 'Соль', 'measurement_unit': 'г', 'amount': 2}],
+            **fields,
+        }, ensure_ascii=False)
+
+    def test_invalid_field_types_are_reported_per_row(self):
+        created, errors = import_recipes([
+            self.get_row(author=['author@example.com']),
+            self.get_row(author='author@example.com'),
+            self.get_row(name={'ru': 'Рецепт'}),
+        ])
+        self.assertEqual(created, 1)
+        self.assertEqual(
+            [error['line'] for error in errors], [1, 3])
+        self.assertEqual(Recipe.objects.get().author, self.author)
+
+    def test_model_limits_are_reported_per_row(self):
+        created, errors = import_recipes([
+            self.get_row(name='Р' * 256),
+            self.get_row(cooking_time=40000),
+            self.get_row(ingredients=[
+                {'name': 'Соль', 'measurement_unit': 'г', 'amount': 40000}]),
+            self.get_row(name='Р' * 255, cooking_time=32767),
+        ], default_author=self.author)
+        self.assertEqual(created, 1)
+        self.assertEqual([error['line'] for error in errors], [1, 2, 3])
+        self.assertEqual(Recipe.objects.get().cooking_time, 32767)
+
+    def test_database_error_fails_only_its_row(self):
+        save_recipes = bulk.save_recipes
+
+        def fail_broken(rows):
+            if any(row['name'] == 'Сломанный' for _, row in rows):
+                raise DatabaseError('сбой')
+            return save_recipes(rows)
+
+        image = encode(Image.new('RGB', (4, 4), 'red'), 'PNG')
+        before = list_images()
+        with mock.patch('recipes.bulk.save_recipes', fail_broken):
+            created, errors = import_recipes([
+                self.get_row(image=image),
+                self.get_row(name='Сломанный', image=image),
+                self.get_row(),
+            ], default_author=self.author)
+        self.assertEqual(created, 2)
+        self.assertEqual(
+            errors, [{'line': 2, 'error': 'Ошибка записи: сбой'}])
+        # Изображение откатившейся строки удалено, сохраненного - на месте.
+        self.assertEqual(
+            list_images() - before,
+            {recipe.image.name.rsplit('/', 1)[-1]
+             for recipe in Recipe.objects.exclude(image='')})
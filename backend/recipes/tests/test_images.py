@@ -0,0 +1,55 @@
+import base64
+import io
+
+from django.test import SimpleTestCase
+from PIL import Image, PngImagePlugin
+
+from recipes.images import STORAGE, ImageError, save_original
+
+ORIENTATION, MAKE, GPS_INFO = 0x0112, 0x010F, 0x8825
+
+
+def encode(image, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def open_saved(name):
+    with STORAGE.open(name) as file:
+        image = Image.open(io.BytesIO(file.read()))
+        image.load()
+    return image
+
+
+class SaveOriginalTest(SimpleTestCase):
+
+    def test_strips_exif_and_applies_orientation(self):
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        exif[MAKE] = 'Камера'
+        exif.get_ifd(GPS_INFO)[2] = (55.0, 45.0, 0.0)
+        name = save_original(encode(
+            Image.new('RGB', (40, 20), 'red'), 'JPEG', exif=exif.tobytes()))
+        image = open_saved(name)
+        self.assertTrue(name.endswith('.jpg'))
+        self.assertEqual(image.size, (20, 40))
+        self.assertEqual(dict(image.getexif()), {})
+        self.assertNotIn('exif', image.info)
+
+    def test_strips_png_text_chunks(self):
+        info = PngImagePlugin.PngInfo()
+        info.add_text('Comment', 'секрет')
+        name = save_original(
+            'data:image/png;base64,' + encode(
+                Image.new('RGBA', (10, 10)), 'PNG', pnginfo=info))
+        image = open_saved(name)
+        self.assertTrue(name.endswith('.png'))
+        self.assertEqual(image.mode, 'RGBA')
+        self.assertNotIn('Comment', image.info)
+
+    def test_rejects_invalid_data(self):
+        for data in (None, 'не base64', base64.b64encode(b'text').decode()):
+            with self.subTest(data=data):
+                with self.assertRaises(ImageError):
+                    save_original(data)
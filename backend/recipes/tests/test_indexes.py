@@ -0,0 +1,34 @@
+from django.db.models import Exists, OuterRef
+from django.test import TestCase
+
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.tests.factories import create_recipes, create_user
+from recipes.tests.plans import explain, postgresql_only
+
+
+@postgresql_only
+class IndexUsageTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(1)
+        cls.tag = Tag.objects.create(
+            name='Завтрак', color='#000000', slug='breakfast')
+        Ingredient.objects.create(name='Соль', measurement_unit='г')
+        create_recipes([cls.author, create_user(2)], 4, [cls.tag])
+
+    def test_author_recipes_use_author_id_index(self):
+        # Основной запрос ленты автора и превью в подписках.
+        plan = explain(
+            Recipe.objects.filter(author=self.author).order_by('-id')[:6])
+        self.assertIn('recipe_author_id_idx', plan)
+
+    def test_ingredient_prefix_search_uses_pattern_index(self):
+        plan = explain(Ingredient.objects.filter(name__istartswith='сол'))
+        self.assertIn('recipes_ingredient_name_upper_like', plan)
+
+    def test_tag_filter_uses_tag_through_index(self):
+        tags = Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk'), tag_id__in=[self.tag.id])
+        plan = explain(Recipe.objects.filter(Exists(tags))[:6])
+        self.assertIn('recipes_recipe_tags_tag_recipe', plan)
@@ -0,0 +1,53 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from recipes.ingredient_index import IngredientIndex
+from recipes.models import Ingredient
+
+
+class IngredientIndexTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('Сахарная пудра', 'Сахар', 'Ванильный сахар',
+                     'сахар тростниковый', 'Соль'):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def setUp(self):
+        cache.clear()
+        self.index = IngredientIndex()
+
+    def get_names(self, query, limit=None):
+        return [item['name'] for item in self.index.search(query, limit)]
+
+    def test_prefix_matches_rank_before_substring(self):
+        self.assertEqual(self.get_names('сах'), [
+            'Сахар', 'сахар тростниковый', 'Сахарная пудра',
+            'Ванильный сахар'])
+
+    def test_limit(self):
+        self.assertEqual(
+            self.get_names('сах', 2), ['Сахар', 'сахар тростниковый'])
+        self.assertEqual(
+            self.get_names('ахар', 1), ['Ванильный сахар'])
+        with self.settings(INGREDIENT_SEARCH_LIMIT=3):
+            self.assertEqual(len(self.get_names('а')), 3)
+
+    def test_index_is_loaded_once(self):
+        self.get_names('сах')
+        with self.assertNumQueries(0):
+            self.get_names('соль')
+
+    def test_signals_invalidate_index(self):
+        self.assertEqual(self.get_names('мед'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            honey = Ingredient.objects.create(
+                name='Мед', measurement_unit='г')
+        self.assertEqual(self.get_names('мед'), ['Мед'])
+        with self.captureOnCommitCallbacks(execute=True):
+            honey.name = 'Мед цветочный'
+            honey.save()
+        self.assertEqual(self.get_names('мед'), ['Мед цветочный'])
+        with self.captureOnCommitCallbacks(execute=True):
+            honey.delete()
+        self.assertEqual(self.get_names('мед'), [])
@@ -0,0 +1,57 @@
+import base64
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from recipes.jobs import claim_job, process_job
+from recipes.models import ImageJob, ImageStatus, Recipe
+from recipes.tests.factories import create_recipes, create_user
+
+
+def get_payload(size):
+    buffer = io.BytesIO()
+    Image.new('RGB', size).save(buffer, 'PNG')
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+@override_settings(IMAGE_JOB_MAX_ATTEMPTS=3)
+class ImageJobTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe, = create_recipes([create_user(1)], 1)
+
+    def create_job(self, **fields):
+        return ImageJob.objects.create(
+            recipe=self.recipe, payload=get_payload((10, 10)), **fields)
+
+    def test_exhausted_stuck_job_fails_instead_of_reclaim(self):
+        job = self.create_job(
+            status=ImageJob.Status.PROCESSING, attempts=3,
+            run_after=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(claim_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageJob.Status.FAILED)
+        self.assertEqual(
+            Recipe.objects.get(id=self.recipe.id).image_status,
+            ImageStatus.FAILED)
+
+    def test_stuck_job_with_attempts_left_is_reclaimed(self):
+        job = self.create_job(
+            status=ImageJob.Status.PROCESSING, attempts=2,
+            run_after=timezone.now() - timedelta(seconds=1))
+        claimed = claim_job()
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.attempts, 3)
+
+    def test_decompression_bomb_fails_without_retry(self):
+        job = self.create_job()
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 20):
+            process_job(claim_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageJob.Status.FAILED)
+        self.assertEqual(job.attempts, 1)
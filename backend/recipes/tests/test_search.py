@@ -0,0 +1,60 @@
+import unittest
+
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from recipes.search import SEARCH_INDEX, search_recipes, update_search_vector
+from recipes.tests.factories import create_user
+from recipes.tests.plans import explain, postgresql_only
+
+
+class SearchTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user(1)
+        beet = Ingredient.objects.create(name='Свекла', measurement_unit='г')
+        cls.borscht = Recipe.objects.create(
+            author=author, name='Борщ', text='Суп на говяжьем бульоне',
+            cooking_time=90)
+        RecipeIngredient.objects.create(
+            recipe=cls.borscht, ingredient=beet, amount=300)
+        cls.pancakes = Recipe.objects.create(
+            author=author, name='Блины', text='Подавать со сметаной',
+            cooking_time=30)
+        update_search_vector(Recipe.objects.all())
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, value):
+        response = self.client.get('/api/recipes/', {'search': value})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_search_by_name_text_and_ingredient(self):
+        self.assertEqual(self.search('борщ'), [self.borscht.id])
+        self.assertEqual(self.search('сметаной'), [self.pancakes.id])
+        self.assertEqual(self.search('свекла'), [self.borscht.id])
+        self.assertEqual(self.search('ананас'), [])
+
+    @unittest.skipIf(
+        connection.vendor == 'postgresql', 'Проверяется запасной вариант.')
+    def test_fallback_matches_substrings(self):
+        self.assertEqual(self.search('бульон'), [self.borscht.id])
+        self.assertEqual(self.search('свек'), [self.borscht.id])
+
+    @postgresql_only
+    def test_ranks_name_above_text(self):
+        soup = Recipe.objects.create(
+            author=self.borscht.author, name='Щи',
+            text='Почти борщ, но без свеклы', cooking_time=60)
+        update_search_vector(Recipe.objects.filter(id=soup.id))
+        self.assertEqual(self.search('борщ'), [self.borscht.id, soup.id])
+
+    @postgresql_only
+    def test_search_uses_gin_index(self):
+        plan = explain(search_recipes(Recipe.objects.all(), 'борщ'))
+        self.assertIn(SEARCH_INDEX, plan)
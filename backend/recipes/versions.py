@@ -0,0 +1,47 @@
+import uuid
+
+from django.core.cache import cache
+
+# Какие закешированные данные устаревают при изменении каждой из моделей.
+DEPENDENCIES = {
+    'recipe': ('recipes',),
+    'tag': ('tags', 'recipes'),
+    'ingredient': ('ingredients', 'recipes'),
+}
+
+
+def get_key(scope):
+    return f'version:{scope}'
+
+
+def get_version(scope):
+    return cache.get_or_set(get_key(scope), uuid.uuid4().hex, None)
+
+
+def get_versions(scopes):
+    keys = {scope: get_key(scope) for scope in scopes}
+    versions = cache.get_many(keys.values())
+    missing = [key for key in keys.values() if key not in versions]
+    for key in missing:
+        cache.add(key, uuid.uuid4().hex, None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return {scope: versions.get(key) for scope, key in keys.items()}
+
+
+def get_recipe_scope(recipe_id):
+    return f'recipe:{recipe_id}'
+
+
+def bump(*scopes):
+    cache.set_many(
+        {get_key(scope): uuid.uuid4().hex for scope in scopes}, None)
+
+
+def bump_model(name):
+    bump(*DEPENDENCIES[name])
+
+
+def bump_recipes(recipe_ids):
+    # Общая версия сбрасывает кеш ответов, версии рецептов - их фрагменты.
+    bump('recipes', *map(get_recipe_scope, recipe_ids))
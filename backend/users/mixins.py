@@ -1,7 +1,12 @@
 class GetSubscribedMixin:
 
+    def get_subscriptions(self):
+        request = self.context['request']
+        if not hasattr(request, 'subscriptions'):
+            request.subscriptions = set(
+                request.user.follower.values_list('author_id', flat=True)
+            ) if request.user.is_authenticated else set()
+        return request.subscriptions
+
     def get_is_subscribed(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return user.follower.filter(author=obj).exists()
-        return False
+        return obj.id in self.get_subscriptions()
@@ -41,7 +41,8 @@ class TokenSerializer(serializers.Serializer):
 
 
 class ListUserSerializer(GetSubscribedMixin, serializers.ModelSerializer):
-    is_subscribed = serializers.BooleanField(read_only=True)
+    is_subscribed = serializers.SerializerMethodField(
+        read_only=True)
 
     class Meta:
         model = User